@@ -0,0 +1,152 @@
+"""Runs deep research over many topics from a JSONL file.
+
+Each input line is a JSON object with a `topic` (or `title`) and optionally
+an `id` (or `request_id`) and a `priority` (higher runs first). Results are
+appended to the output JSONL as soon as each topic finishes. Topics already
+present in the output are skipped, so an interrupted batch can be restarted
+with the same command.
+
+    python batch_runner.py topics.jsonl reports.jsonl --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from deep_research import (
+    CHECKPOINT_DB,
+    CHECKPOINT_KEEP_THREADS,
+    MAX_CONCURRENCY,
+    TRACE_FILE,
+    arun_inputs,
+    llm_cache,
+    parent_builder,
+    search_cache,
+    telemetry,
+)
+
+# deep_research has put the repository root on sys.path by now.
+from core import aretry_with_backoff, compact_checkpoints
+
+
+def load_topics(path):
+    """Reads the topic file into (priority, line_no, job) tuples."""
+    jobs = []
+    with open(path) as f:
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            topic = record.get("topic") or record["title"]
+            job_id = str(record.get("id") or record.get("request_id") or line_no)
+            jobs.append(
+                (
+                    -int(record.get("priority", 0)),
+                    line_no,
+                    {"id": job_id, "topic": topic},
+                )
+            )
+    return jobs
+
+
+def finished_ids(path):
+    if not Path(path).exists():
+        return set()
+    with open(path) as f:
+        return {
+            record["id"]
+            for record in map(json.loads, filter(str.strip, f))
+            if record.get("status") == "ok"
+        }
+
+
+async def run_job(graph, job):
+    # One checkpoint thread per topic: a retried or restarted topic resumes
+    # where it stopped instead of redoing finished subtopics.
+    config = {
+        "configurable": {"thread_id": f"batch-{job['id']}"},
+        "max_concurrency": MAX_CONCURRENCY,
+    }
+    with telemetry.span("batch.topic", id=job["id"], topic=job["topic"]):
+        inputs = await arun_inputs(graph, job["topic"], config)
+        return await graph.ainvoke(inputs, config=config)
+
+
+async def worker(name, graph, queue, output, lock, retries):
+    while True:
+        _, _, job = await queue.get()
+        started = time.perf_counter()
+        try:
+            state = await aretry_with_backoff(
+                run_job, graph, job, retries=retries, base_delay=5.0
+            )
+            record = {**job, "status": "ok", "final_report": state["final_report"]}
+        except Exception as e:
+            print(f"[Batch] {name} failed on {job['id']}: {e}")
+            record = {**job, "status": "error", "error": str(e)}
+        record["elapsed_s"] = round(time.perf_counter() - started, 2)
+
+        async with lock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+        print(f"[Batch] {name} finished {job['id']} ({record['status']})")
+        queue.task_done()
+
+
+async def run_batch(input_path, output_path, workers=4, retries=5):
+    done = finished_ids(output_path)
+    queue = asyncio.PriorityQueue()
+    for job in load_topics(input_path):
+        if job[2]["id"] not in done:
+            queue.put_nowait(job)
+
+    total = queue.qsize()
+    print(
+        f"[Batch] {total} topics queued ({len(done)} already done), {workers} workers"
+    )
+
+    started = time.perf_counter()
+    CHECKPOINT_DB.parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(str(CHECKPOINT_DB)) as checkpointer:
+        graph = parent_builder.compile(checkpointer=checkpointer)
+        lock = asyncio.Lock()
+        with open(output_path, "a") as output:
+            tasks = [
+                asyncio.create_task(
+                    worker(f"worker-{i}", graph, queue, output, lock, retries)
+                )
+                for i in range(workers)
+            ]
+            await queue.join()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n[Batch] {total} topics in {elapsed:.1f}s "
+        f"({total / elapsed * 3600 if elapsed else 0:.1f} topics/hour)"
+    )
+    print(f"[Search Cache] {search_cache.stats()}")
+    print(f"[LLM Cache] {llm_cache.stats()}")
+    compact_checkpoints(CHECKPOINT_DB, keep_threads=CHECKPOINT_KEEP_THREADS)
+
+    print(f"\n{telemetry.summary()}")
+    telemetry.export_jsonl(TRACE_FILE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file with one topic per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--retries", type=int, default=5, help="retries per topic on 429s"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run_batch(args.input, args.output, args.workers, args.retries))
@@ -1,25 +1,103 @@
 import sys
 from pathlib import Path
 
+import asyncio
 import os
 import operator
 from typing import Annotated, TypedDict, Literal
 
 from pydantic import BaseModel, Field
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from tavily import TavilyClient
 
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START
-from langgraph.types import Command
+from langgraph.types import Command, Send
 
 sys.path.append(str(Path().resolve().parent))
-from core import load_vault_env
+from core import (
+    LLMCache,
+    NearDuplicateFilter,
+    SearchCache,
+    SearchCacheMiss,
+    Telemetry,
+    compact_checkpoints,
+    count_tokens,
+    load_vault_env,
+    split_snippets,
+    truncate_to_tokens,
+)
 
 load_vault_env()
 
-
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
-tavily = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+CACHE_DIR = Path(
+    os.getenv("DEEP_RESEARCH_CACHE_DIR", Path(__file__).resolve().parent / ".cache")
+)
+TRACE_FILE = Path(os.getenv("DEEP_RESEARCH_TRACE_FILE", CACHE_DIR / "traces.jsonl"))
+# Serve Tavily results from the cache only and fail fast on misses (offline runs).
+SEARCH_REPLAY_ONLY = os.getenv("DEEP_RESEARCH_SEARCH_REPLAY_ONLY") == "1"
+
+telemetry = Telemetry()
+
+
+class TracedTavilyClient(TavilyClient):
+    """TavilyClient whose API calls are recorded as `tavily.search` spans."""
+
+    @telemetry.trace("tavily.search")
+    def search(self, *args, **kwargs):
+        return super().search(*args, **kwargs)
+
+
+# Token buckets shared by every graph run in this process (e.g. batch workers).
+openai_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "5")),
+    max_bucket_size=10,
+)
+tavily_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=float(os.getenv("TAVILY_REQUESTS_PER_SECOND", "2")),
+    max_bucket_size=5,
+)
+
+# The OpenAI client retries 429s itself with exponential backoff.
+llm = ChatOpenAI(
+    model="gpt-4.1-mini",
+    temperature=0,
+    rate_limiter=openai_rate_limiter,
+    max_retries=6,
+    callbacks=[telemetry.callback_handler()],
+)
+tavily = (
+    None
+    if SEARCH_REPLAY_ONLY
+    else TracedTavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+)
+search_cache = SearchCache(
+    tavily,
+    CACHE_DIR / "search_cache.sqlite",
+    ttl_seconds=int(os.getenv("DEEP_RESEARCH_SEARCH_CACHE_TTL", "604800")),
+    max_entries=int(os.getenv("DEEP_RESEARCH_SEARCH_CACHE_SIZE", "10000")),
+    replay_only=SEARCH_REPLAY_ONLY,
+    rate_limiter=tavily_rate_limiter,
+)
+llm_cache = LLMCache(CACHE_DIR / "llm_cache.sqlite")
+
+CHECKPOINT_DB = CACHE_DIR / "checkpoints.sqlite"
+# Number of most recent threads whose checkpoints survive compaction.
+CHECKPOINT_KEEP_THREADS = int(os.getenv("DEEP_RESEARCH_CHECKPOINT_KEEP_THREADS", "20"))
+
+# Upper bound on child research agents running at the same time.
+MAX_CONCURRENCY = int(os.getenv("DEEP_RESEARCH_MAX_CONCURRENCY", "3"))
+
+# Defaults for the per-run `configurable` keys read by the child graph.
+# A summary budget of 0 falls back to sending the full findings history.
+MAX_SEARCH_LOOPS = 3
+SUMMARY_TOKEN_BUDGET = 1500
+# Token ceiling for each section draft's input and for the final merge prompt.
+WRITER_TOKEN_BUDGET = 6000
 
 
 # Child State
@@ -27,6 +105,8 @@ class ResearchState(TypedDict):
     query: str
     findings: Annotated[list, operator.add]
     loop_count: int
+    summary: str
+    dedup_tokens_removed: Annotated[int, operator.add]
 
 
 # Structured Output
@@ -37,34 +117,91 @@ class Evaluation(BaseModel):
     new_query: str = Field("Refined query if insufficient")
 
 
+class IncrementalEvaluation(Evaluation):
+    summary: str = Field(
+        description="Running summary of all findings so far, including the newest one."
+    )
+
+
+@telemetry.node
 def search_step(state: ResearchState) -> Command[Literal["evaluate_step"]]:
     print(f"  [Child] Searching: {state['query']} (Iter: {state['loop_count']})")
+    removed = 0
     try:
-        result = tavily.search(state["query"], max_results=2, search_depth="basic")
-        content = "\n".join([r["content"] for r in result.get("results", [])])
-        finding = f"--- Search Iteration {state['loop_count']} ---\n{content}\n"
+        result = search_cache.search(
+            state["query"], max_results=2, search_depth="basic"
+        )
+    except SearchCacheMiss:
+        raise
     except Exception as e:
+        result = None
         finding = f"Error: {e}"
 
+    if result is not None:
+        # Drop snippets that repeat what earlier iterations already found.
+        dedup = NearDuplicateFilter()
+        for previous in state["findings"]:
+            dedup.filter(split_snippets(previous))
+        kept, dropped = dedup.filter([r["content"] for r in result.get("results", [])])
+        removed = sum(count_tokens(snippet) for snippet in dropped)
+        if dropped:
+            print(
+                f"  [Child] Dropped {len(dropped)} duplicate snippets (~{removed} tokens)"
+            )
+
+        content = "\n\n".join(kept) or "(no new information)"
+        finding = f"--- Search Iteration {state['loop_count']} ---\n\n{content}\n"
+
     # Return update and move to evaluation
     return Command(
-        update={"findings": [finding], "loop_count": state["loop_count"] + 1},
+        update={
+            "findings": [finding],
+            "loop_count": state["loop_count"] + 1,
+            "dedup_tokens_removed": removed,
+        },
         goto="evaluate_step",
     )
 
 
-def evaluate_step(state: ResearchState) -> Command[Literal["search_step", "__end__"]]:
+@telemetry.node
+def evaluate_step(
+    state: ResearchState, config: RunnableConfig
+) -> Command[Literal["search_step", "__end__"]]:
     print("  [Child] Evaluating findings...")
 
-    context = "\n".join(state["findings"])
-    evaluator = llm.with_structured_output(Evaluation)
-
-    res = evaluator.invoke(f"Query: {state['query']}\n\nFindings:\n{context}")
+    configurable = config.get("configurable", {})
+    max_loops = configurable.get("max_search_loops", MAX_SEARCH_LOOPS)
+    budget = configurable.get("summary_token_budget", SUMMARY_TOKEN_BUDGET)
+
+    update = {}
+    if budget:
+        # Incremental mode: the evaluator only sees the rolling summary plus the
+        # newest finding, and folds that finding into the summary it returns.
+        newest = truncate_to_tokens(state["findings"][-1], budget)
+        res = llm_cache.invoke(
+            llm,
+            f"Query: {state['query']}\n\n"
+            f"Summary of earlier findings:\n{state.get('summary') or 'None yet.'}\n\n"
+            f"Newest finding:\n{newest}\n\n"
+            f"Also return an updated summary of all findings in under {budget} tokens.",
+            schema=IncrementalEvaluation,
+            node="evaluate_step",
+        )
+        update["summary"] = truncate_to_tokens(res.summary, budget)
+    else:
+        context = "\n".join(state["findings"])
+        res = llm_cache.invoke(
+            llm,
+            f"Query: {state['query']}\n\nFindings:\n{context}",
+            schema=Evaluation,
+            node="evaluate_step",
+        )
 
-    if res.status == "sufficient" or state["loop_count"] >= 3:
-        return Command(goto="__end__")
+    if res.status == "sufficient" or state["loop_count"] >= max_loops:
+        telemetry.observe("child_loop_count", state["loop_count"])
+        return Command(update=update, goto="__end__")
     else:
-        return Command(update={"query": res.new_query}, goto="search_step")
+        return Command(update={**update, "query": res.new_query}, goto="search_step")
 
 
 # --- BUILD CHILD GRAPH ---
@@ -77,11 +214,22 @@ research_graph = research_builder.compile()
 
 
 # --- PARENT STATE ---
+# Script runs reuse one checkpointed thread, so planner_node sends None to
+# clear the accumulated keys left over from the previous run.
+def merge_results(current, update):
+    return {} if update is None else {**current, **update}
+
+
+def add_tokens(current, update):
+    return 0 if update is None else current + update
+
+
 class EditorState(TypedDict):
     topic: str
     subtopics: list[str]
     final_report: str
-    research_results: Annotated[dict, lambda a, b: {**a, **b}]
+    research_results: Annotated[dict, merge_results]
+    dedup_tokens_removed: Annotated[int, add_tokens]
 
 
 class Plan(BaseModel):
@@ -90,71 +238,249 @@ class Plan(BaseModel):
     )
 
 
+@telemetry.node
 def planner_node(state: EditorState) -> Command[Literal["research_orchestrator"]]:
     print(f"\n[Parent] Planning research for: {state['topic']}")
 
-    planner = llm.with_structured_output(Plan)
-    res = planner.invoke(f"Topic: {state['topic']}")
+    res = llm_cache.invoke(
+        llm, f"Topic: {state['topic']}", schema=Plan, node="planner_node"
+    )
 
-    return Command(update={"subtopics": res.subtopics}, goto="research_orchestrator")
+    return Command(
+        update={
+            "subtopics": res.subtopics,
+            "research_results": None,
+            "dedup_tokens_removed": None,
+        },
+        goto="research_orchestrator",
+    )
 
 
-def research_orchestrator(state: EditorState) -> Command[Literal["writer_node"]]:
-    print("[Parent] Delegating to Researcher Agent...")
+class SubtopicTask(TypedDict):
+    subtopic: str
 
-    results = {}
 
-    for topic in state["subtopics"]:
-        print(f"\n--- Spawning Child Agent for: {topic} ---")
+@telemetry.node
+def research_orchestrator(state: EditorState) -> Command[Literal["research_subtopic"]]:
+    print("[Parent] Delegating to Researcher Agents...")
 
-        # Invoke child research graph
-        child_result = research_graph.invoke(
-            {"query": topic, "findings": [], "loop_count": 0}
-        )
+    # Fan out one child research graph per subtopic. LangGraph runs all Send
+    # tasks in the same superstep, so they execute in parallel (bounded by the
+    # `max_concurrency` key of the run config) and the writer only starts once
+    # every subtopic has finished.
+    return Command(
+        goto=[
+            Send("research_subtopic", {"subtopic": topic})
+            for topic in state["subtopics"]
+        ]
+    )
 
-        full_text = "\n".join(child_result["findings"])
-        results[topic] = full_text
 
-    return Command(update={"research_results": results}, goto="writer_node")
+@telemetry.node
+def research_subtopic(task: SubtopicTask) -> dict:
+    topic = task["subtopic"]
+    print(f"\n--- Spawning Child Agent for: {topic} ---")
+
+    # Invoke child research graph
+    child_result = research_graph.invoke(
+        {
+            "query": topic,
+            "findings": [],
+            "loop_count": 0,
+            "summary": "",
+            "dedup_tokens_removed": 0,
+        }
+    )
 
+    full_text = "\n".join(child_result["findings"])
+    return {
+        "research_results": {topic: full_text},
+        "dedup_tokens_removed": child_result["dedup_tokens_removed"],
+    }
 
-def writer_node(state: EditorState) -> Command[Literal["__end__"]]:
+
+@telemetry.node
+def writer_node(
+    state: EditorState, config: RunnableConfig
+) -> Command[Literal["__end__"]]:
     print("\n[Parent] Synthesizing Final Report...")
 
-    context = ""
-    for topic, data in state["research_results"].items():
-        context += f"## {topic}\n{data}\n\n"
+    budget = config.get("configurable", {}).get(
+        "writer_token_budget", WRITER_TOKEN_BUDGET
+    )
+    subtopics = state["subtopics"]
+
+    # Different subtopics often surface the same articles; keep each snippet
+    # only in the first subtopic (in planner order) that found it.
+    dedup = NearDuplicateFilter()
+    research, removed = {}, 0
+    for topic in subtopics:
+        kept, dropped = dedup.filter(split_snippets(state["research_results"][topic]))
+        research[topic] = "\n\n".join(kept)
+        removed += sum(count_tokens(snippet) for snippet in dropped)
+    print(
+        f"[Parent] Removed ~{removed} duplicate tokens across subtopics "
+        f"(~{state.get('dedup_tokens_removed', 0) + removed} in total)"
+    )
 
-    prompt = f"Write a comprehensive report on '{state['topic']}' using the following data:\n\n{context}"
-    response = llm.invoke(prompt)
+    # Map: draft one section per subtopic in parallel, each from its own findings.
+    section_prompts = [
+        f"Write a concise report section answering '{topic}' as part of a report "
+        f"on '{state['topic']}', using the following data:\n\n"
+        f"{truncate_to_tokens(research[topic], budget)}"
+        for topic in subtopics
+    ]
+    sections = llm_cache.batch(
+        llm,
+        section_prompts,
+        node="writer_node",
+        config={"max_concurrency": config.get("max_concurrency")},
+    )
 
-    return Command(update={"final_report": response.content}, goto="__end__")
+    # Reduce: merge the drafts (in planner order) into the final report.
+    emit = get_stream_writer()
+    for topic, section in zip(subtopics, sections):
+        emit({"event": "section", "subtopic": topic, "content": section.content})
+
+    section_budget = budget // max(len(subtopics), 1)
+    context = "\n\n".join(
+        f"## {topic}\n{truncate_to_tokens(section.content, section_budget)}"
+        for topic, section in zip(subtopics, sections)
+    )
+
+    prompt = f"Write a comprehensive report on '{state['topic']}' by merging the following section drafts:\n\n{context}"
+    response = llm_cache.invoke(
+        llm, prompt, node="writer_node", config={"tags": ["final_report"]}
+    )
+
+    return Command(
+        update={"final_report": response.content, "dedup_tokens_removed": removed},
+        goto="__end__",
+    )
 
 
 # --- BUILD PARENT GRAPH ---
 parent_builder = StateGraph(EditorState)
 parent_builder.add_node("planner_node", planner_node)
 parent_builder.add_node("research_orchestrator", research_orchestrator)
+parent_builder.add_node("research_subtopic", research_subtopic)
 parent_builder.add_node("writer_node", writer_node)
 
 parent_builder.add_edge(START, "planner_node")
+parent_builder.add_edge("research_subtopic", "writer_node")
 
-# Compile with Checkpointer (Memory)
-# checkpointer = InMemorySaver()
+# The LangGraph server (langgraph.json) provides its own persistence, so `app`
+# is compiled without a checkpointer. Script runs compile the same builder with
+# a SQLite checkpointer instead; the child graph inherits it as a subgraph.
 app = parent_builder.compile()
 
 
+def run_inputs(graph, topic: str, config: RunnableConfig):
+    """Returns None to resume an unfinished checkpointed thread, else fresh inputs."""
+    if graph.checkpointer is not None and graph.get_state(config).next:
+        print("[Parent] Resuming unfinished run from checkpoint...")
+        return None
+    return {"topic": topic}
+
+
+async def arun_inputs(graph, topic: str, config: RunnableConfig):
+    """Async variant of `run_inputs`."""
+    if graph.checkpointer is not None and (await graph.aget_state(config)).next:
+        print("[Parent] Resuming unfinished run from checkpoint...")
+        return None
+    return {"topic": topic}
+
+
+async def astream_report(topic: str, config: RunnableConfig | None = None, graph=app):
+    """Runs the research graph and yields progress events as they happen.
+
+    Every event is a dict with an ``event`` key: ``plan`` (planner subtopics),
+    ``subtopic_done`` (one child agent finished), ``section`` (a writer draft),
+    ``token`` (final report text as it is generated) and ``report``.
+    """
+    async for mode, chunk in graph.astream(
+        await arun_inputs(graph, topic, config),
+        config=config,
+        stream_mode=["updates", "custom", "messages"],
+    ):
+        if mode == "custom":
+            yield chunk
+        elif mode == "messages":
+            message, metadata = chunk
+            if "final_report" in metadata.get("tags", []) and message.content:
+                yield {"event": "token", "content": message.content}
+        else:
+            for node, update in chunk.items():
+                if node == "planner_node":
+                    yield {"event": "plan", "subtopics": update["subtopics"]}
+                elif node == "research_subtopic":
+                    for subtopic, findings in update["research_results"].items():
+                        yield {
+                            "event": "subtopic_done",
+                            "subtopic": subtopic,
+                            "findings": findings,
+                        }
+                elif node == "writer_node":
+                    yield {"event": "report", "content": update["final_report"]}
+
+
+async def print_report_stream(topic: str, config: RunnableConfig | None = None):
+    async with AsyncSqliteSaver.from_conn_string(str(CHECKPOINT_DB)) as checkpointer:
+        graph = parent_builder.compile(checkpointer=checkpointer)
+        await _print_events(astream_report(topic, config, graph))
+
+
+async def _print_events(events):
+    streamed_tokens = False
+    async for event in events:
+        if event["event"] == "plan":
+            print(f"\n[Stream] Plan: {event['subtopics']}")
+        elif event["event"] == "subtopic_done":
+            print(f"\n[Stream] Finished research on: {event['subtopic']}")
+        elif event["event"] == "section":
+            print(f"\n[Stream] Drafted section: {event['subtopic']}")
+        elif event["event"] == "token":
+            streamed_tokens = True
+            print(event["content"], end="", flush=True)
+        elif not streamed_tokens:
+            # Cached reports arrive in one piece instead of token by token.
+            print(event["content"])
+    print()
+
+
 if __name__ == "__main__":
-    thread_config = {"configurable": {"thread_id": "workshop_v3_latest"}}
+    thread_config = {
+        "configurable": {"thread_id": "workshop_v3_latest"},
+        "max_concurrency": MAX_CONCURRENCY,
+    }
 
     topic = "Comparison of M4 Apple Silicon vs NVIDIA Blackwell for AI Inference"
 
     print(f"Starting Multi-Agent Deep Research on: {topic}")
 
-    # Run
-    final_state = app.invoke({"topic": topic}, config=thread_config)
-
-    print("\n\n" + "=" * 50)
-    print("FINAL DEEP RESEARCH REPORT")
-    print("=" * 50)
-    print(final_state["final_report"])
+    # Run (re-running after a crash resumes the same thread from its checkpoint)
+    CHECKPOINT_DB.parent.mkdir(parents=True, exist_ok=True)
+    with telemetry.span("deep_research.run", topic=topic):
+        if "--stream" in sys.argv:
+            asyncio.run(print_report_stream(topic, thread_config))
+        else:
+            with SqliteSaver.from_conn_string(str(CHECKPOINT_DB)) as checkpointer:
+                durable_app = parent_builder.compile(checkpointer=checkpointer)
+                final_state = durable_app.invoke(
+                    run_inputs(durable_app, topic, thread_config), config=thread_config
+                )
+
+            print("\n\n" + "=" * 50)
+            print("FINAL DEEP RESEARCH REPORT")
+            print("=" * 50)
+            print(final_state["final_report"])
+
+    removed = compact_checkpoints(CHECKPOINT_DB, keep_threads=CHECKPOINT_KEEP_THREADS)
+    print(f"\n[Checkpoints] Compacted {removed} superseded checkpoints")
+
+    print(f"\n[Search Cache] {search_cache.stats()}")
+    print(f"[LLM Cache] {llm_cache.stats()}")
+
+    print(f"\n{telemetry.summary()}")
+    telemetry.export_jsonl(TRACE_FILE)
+    print(f"\n[Telemetry] Spans written to {TRACE_FILE}")
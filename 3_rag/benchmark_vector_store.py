@@ -0,0 +1,112 @@
+"""Compares LocalVectorStore with Qdrant on recall and query latency.
+
+Copies a Qdrant collection into a LocalVectorStore (no re-embedding), then
+runs the same queries against both. Queries are stored vectors with a little
+Gaussian noise, so no embedding calls are needed. The local store is an
+exact search, so recall@k is the share of its top-k that Qdrant's (HNSW)
+top-k also returns.
+
+    python benchmark_vector_store.py --collection apex_policies --queries 200
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core import LocalVectorStore, category_filter, get_qdrant_client, load_vault_env
+
+
+def _percentiles(samples_ms):
+    cuts = (
+        statistics.quantiles(samples_ms, n=100)
+        if len(samples_ms) > 1
+        else samples_ms * 99
+    )
+    return {"p50_ms": round(cuts[49], 3), "p95_ms": round(cuts[94], 3)}
+
+
+def run(client, collection, queries=200, k=3, noise=0.05, filtered=False, seed=0):
+    started = time.perf_counter()
+    local = LocalVectorStore.from_qdrant(client, collection, embedding=None)
+    load_s = time.perf_counter() - started
+    print(
+        f"[Benchmark] Loaded {len(local)} vectors from '{collection}' in {load_s:.2f}s"
+    )
+
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(local), size=queries)
+    vectors = np.asarray(local._vectors[rows], dtype=np.float32)
+    vectors += rng.normal(0, noise, vectors.shape).astype(np.float32)
+    filters = [
+        category_filter(local._docs[row].metadata.get("category")) if filtered else None
+        for row in rows
+    ]
+
+    local_ms, qdrant_ms, recalls = [], [], []
+    for vector, q_filter in zip(vectors, filters):
+        t = time.perf_counter()
+        local_hits = local.similarity_search_by_vector_with_score(
+            vector, k=k, filter=q_filter
+        )
+        local_ms.append((time.perf_counter() - t) * 1e3)
+
+        t = time.perf_counter()
+        qdrant_hits = client.query_points(
+            collection, query=vector.tolist(), limit=k, query_filter=q_filter
+        ).points
+        qdrant_ms.append((time.perf_counter() - t) * 1e3)
+
+        expected = {doc.id for doc, _ in local_hits}
+        if expected:
+            found = {str(p.id) for p in qdrant_hits}
+            recalls.append(len(expected & found) / len(expected))
+
+    # Many questions at once: one matrix product instead of one per query.
+    batch_ms = None
+    if not filtered:
+        t = time.perf_counter()
+        local.similarity_search_by_vectors_with_score(vectors, k=k)
+        batch_ms = (time.perf_counter() - t) * 1e3
+
+    return {
+        "collection": collection,
+        "vectors": len(local),
+        "queries": queries,
+        "k": k,
+        "filtered": filtered,
+        "local_load_s": round(load_s, 2),
+        "recall_at_k": round(statistics.fmean(recalls), 4) if recalls else None,
+        "local": _percentiles(local_ms),
+        "qdrant": _percentiles(qdrant_ms),
+        "local_batch_ms_per_query": (
+            round(batch_ms / queries, 3) if batch_ms is not None else None
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collection", default="apex_policies")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument(
+        "--filtered", action="store_true", help="restrict each query to its category"
+    )
+    parser.add_argument("--output", default="vector_store_benchmark.json")
+    args = parser.parse_args()
+
+    load_vault_env()
+    client = get_qdrant_client()
+    report = run(
+        client, args.collection, args.queries, args.k, args.noise, args.filtered
+    )
+    print(json.dumps(report, indent=2))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,341 @@
+"""Load-tests the Campus Defender Ops MCP server on a synthetic database.
+
+Generates `anomalies`/`hunters` tables at the requested scale, starts the
+server (one stdio process per client, or one multi-worker HTTP server), and
+drives the four campus tools from many concurrent MCP clients with a mixed
+read/write workload. Latency percentiles, throughput and error counts are
+printed and written to a JSON file so runs can be compared.
+
+    python benchmark.py generate bench.db --threats 1000000 --hunters 100000
+    python benchmark.py run bench.db --transport http --workers 4 --clients 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport
+
+from campus_db import migrate
+
+SERVER = Path(__file__).resolve().parent / "server.py"
+
+LOCATIONS = [
+    "Main Library",
+    "Cafeteria",
+    "Server Room",
+    "Chemistry Lab",
+    "Dormitory B",
+    "Lecture Hall 1",
+    "Parking Lot",
+    "Gymnasium",
+]
+THREAT_TYPES = [
+    "Infinite Recursion Loop",
+    "Sentient Coffee Machine",
+    "Null Pointer Wraith",
+    "Memory Leak Slime",
+    "Race Condition Twins",
+    "Deadlock Golem",
+]
+MAJORS = ["Computer Science", "Philosophy", "Engineering", "Physics", "Art"]
+EQUIPMENT = ["Debugger Staff", "Logic Shield", "Mjolnir Mallet", "Garbage Collector"]
+
+READ_TOOLS = ("scan_active_threats", "list_available_hunters")
+
+
+def _chunks(rows, size=100_000):
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def generate(path, threats, hunters, active_ratio=0.5, available_ratio=0.7, seed=0):
+    """Creates a fresh database at `path` with the given number of rows."""
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("BEGIN")
+    migrate(conn)
+
+    # The change-log triggers would double the insert work and fill the feed
+    # with millions of "created" events; drop them for the bulk load.
+    triggers = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+
+    started = time.perf_counter()
+    anomalies = (
+        (
+            rng.choice(LOCATIONS),
+            rng.choice(THREAT_TYPES),
+            rng.randint(1, 10),
+            "ACTIVE" if rng.random() < active_ratio else "NEUTRALIZED",
+        )
+        for _ in range(threats)
+    )
+    for chunk in _chunks(anomalies):
+        conn.executemany(
+            "INSERT INTO anomalies (location, type, danger_level, status) VALUES (?, ?, ?, ?)",
+            chunk,
+        )
+
+    roster = (
+        (
+            f"Hunter-{i:08d}",
+            rng.choice(MAJORS),
+            rng.choice(EQUIPMENT),
+            "AVAILABLE" if rng.random() < available_ratio else "BUSY",
+        )
+        for i in range(hunters)
+    )
+    for chunk in _chunks(roster):
+        conn.executemany(
+            "INSERT INTO hunters (name, major, equipment, status) VALUES (?, ?, ?, ?)",
+            chunk,
+        )
+
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.close()
+    print(
+        f"[Generate] {threats} threats and {hunters} hunters written to {path} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def _pick_call(rng, write_ratio, threats, hunters, client_id, counter):
+    if rng.random() >= write_ratio:
+        tool = rng.choice(READ_TOOLS)
+        if tool == "scan_active_threats":
+            return tool, {"limit": 20, "min_danger": rng.randint(1, 10)}
+        return tool, {"limit": 20}
+
+    if rng.random() < 0.8:
+        return "deploy_hunter", {
+            "threat_id": rng.randint(1, max(threats, 1)),
+            "hunter_name": f"Hunter-{rng.randrange(max(hunters, 1)):08d}",
+        }
+    return "recruit_new_hunter", {
+        "name": f"Recruit-{client_id}-{counter}-{rng.getrandbits(32):08x}",
+        "major": rng.choice(MAJORS),
+        "equipment": rng.choice(EQUIPMENT),
+    }
+
+
+async def _ignore_log(message):
+    # The tools send ctx.info messages on every call; don't print them.
+    pass
+
+
+async def _client_loop(client_id, transport, args, threats, hunters, latencies, errors):
+    rng = random.Random(args.seed + client_id)
+    async with Client(transport, log_handler=_ignore_log) as client:
+        for i in range(args.requests):
+            tool, params = _pick_call(
+                rng, args.write_ratio, threats, hunters, client_id, i
+            )
+            started = time.perf_counter()
+            try:
+                result = await client.call_tool(tool, params, raise_on_error=False)
+                # "Not found"/"busy" replies are normal outcomes, not failures.
+                failed = result.is_error or (
+                    "Internal System Error" in result.content[0].text
+                )
+            except Exception:
+                failed = True
+            latencies[tool].append((time.perf_counter() - started) * 1e3)
+            if failed:
+                errors[tool] += 1
+
+
+def _wait_for_port(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex((host, port)) == 0:
+                return
+        time.sleep(0.2)
+    raise TimeoutError(f"MCP server did not start on {host}:{port}")
+
+
+def _percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+    }
+
+
+async def run(args):
+    conn = sqlite3.connect(args.db)
+    threats = conn.execute("SELECT MAX(id) FROM anomalies").fetchone()[0] or 0
+    hunters = conn.execute("SELECT COUNT(*) FROM hunters").fetchone()[0]
+    conn.close()
+
+    env = {**os.environ, "CAMPUS_DB": str(Path(args.db).resolve())}
+    log_path = Path(args.output).with_suffix(".server.log")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    server = None
+
+    with open(log_path, "w") as log:
+        if args.transport == "http":
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    str(SERVER),
+                    "--transport",
+                    "http",
+                    "--port",
+                    str(args.port),
+                    "--workers",
+                    str(args.workers),
+                ],
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            _wait_for_port("127.0.0.1", args.port)
+
+            def transport():
+                return f"http://127.0.0.1:{args.port}/mcp"
+        else:
+
+            def transport():
+                return PythonStdioTransport(SERVER, env=env, log_file=log)
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(
+                    _client_loop(
+                        i, transport(), args, threats, hunters, latencies, errors
+                    )
+                    for i in range(args.clients)
+                )
+            )
+        finally:
+            elapsed = time.perf_counter() - started
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    # The tools turn exceptions into "Internal System Error" replies; the
+    # server log tells which of them were SQLITE_BUSY timeouts. Only the
+    # "Error executing ..." lines count; the traceback repeats the message.
+    lock_errors = sum(
+        "Error executing" in line and "database is locked" in line
+        for line in log_path.read_text().splitlines()
+    )
+
+    all_samples = [ms for samples in latencies.values() for ms in samples]
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "db": str(args.db),
+            "threats": threats,
+            "hunters": hunters,
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "http" else args.clients,
+            "clients": args.clients,
+            "requests_per_client": args.requests,
+            "write_ratio": args.write_ratio,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(all_samples) / elapsed, 1) if elapsed else 0.0,
+        "requests": len(all_samples),
+        "errors": sum(errors.values()),
+        "lock_errors": lock_errors,
+        "latency": _percentiles(all_samples) if all_samples else {},
+        "tools": {
+            tool: {
+                "requests": len(samples),
+                "errors": errors[tool],
+                **_percentiles(samples),
+            }
+            for tool, samples in sorted(latencies.items())
+        },
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"[Benchmark] {report['requests']} calls in {report['elapsed_s']}s "
+        f"({report['throughput_rps']} req/s), {report['errors']} errors, "
+        f"{lock_errors} lock errors"
+    )
+    print(
+        f"{'tool':<26}{'calls':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for tool, stats in report["tools"].items():
+        print(
+            f"{tool:<26}{stats['requests']:>8}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+    print(f"Results saved to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="create a synthetic database")
+    gen.add_argument("db")
+    gen.add_argument("--threats", type=int, default=10_000)
+    gen.add_argument("--hunters", type=int, default=1_000)
+    gen.add_argument("--active-ratio", type=float, default=0.5)
+    gen.add_argument("--available-ratio", type=float, default=0.7)
+    gen.add_argument("--seed", type=int, default=0)
+
+    load = commands.add_parser("run", help="load-test the server on a database")
+    load.add_argument("db")
+    load.add_argument("--transport", choices=["stdio", "http"], default="http")
+    load.add_argument("--clients", type=int, default=16)
+    load.add_argument("--requests", type=int, default=100, help="calls per client")
+    load.add_argument(
+        "--write-ratio", type=float, default=0.1, help="share of write calls"
+    )
+    load.add_argument(
+        "--workers", type=int, default=4, help="server processes (http only)"
+    )
+    load.add_argument("--port", type=int, default=8001)
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--output", default="benchmark_results.json")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(
+            args.db,
+            args.threats,
+            args.hunters,
+            args.active_ratio,
+            args.available_ratio,
+            args.seed,
+        )
+    else:
+        asyncio.run(run(args))
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("CampusDefenderOps.db")
+
+# Applied to every pooled connection. WAL lets readers run alongside a writer,
+# and busy_timeout makes concurrent writers wait instead of failing at once.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _check_hunter_names(conn):
+    # Before names were unique, recruiting the same hunter twice inserted a
+    # second row. Which row is current (status, equipment) cannot be decided
+    # here, so the migration stops until an operator removes the extra rows.
+    duplicates = conn.execute(
+        "SELECT name, group_concat(id, ', ') FROM hunters "
+        "GROUP BY name HAVING COUNT(*) > 1 ORDER BY name"
+    ).fetchall()
+    if duplicates:
+        listing = "; ".join(f"{name} (ids {ids})" for name, ids in duplicates)
+        raise sqlite3.IntegrityError(
+            f"Cannot make hunter names unique; delete the extra rows of: {listing}"
+        )
+
+
+# Each entry upgrades the schema by one version; the current version is kept
+# in PRAGMA user_version. Append new migrations, never edit applied ones.
+MIGRATIONS = [
+    # 1: base tables, status indexes and unique hunter names
+    (
+        "CREATE TABLE IF NOT EXISTS anomalies (id INTEGER PRIMARY KEY, location TEXT, type TEXT, danger_level INTEGER, status TEXT)",
+        "CREATE TABLE IF NOT EXISTS hunters (id INTEGER PRIMARY KEY, name TEXT, major TEXT, equipment TEXT, status TEXT)",
+        _check_hunter_names,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_hunters_name ON hunters(name)",
+        "CREATE INDEX IF NOT EXISTS idx_hunters_status ON hunters(status)",
+        "CREATE INDEX IF NOT EXISTS idx_anomalies_active ON anomalies(danger_level) WHERE status = 'ACTIVE'",
+        "CREATE INDEX IF NOT EXISTS idx_anomalies_status_danger ON anomalies(status, danger_level)",
+    ),
+    # 2: (status, id) order for keyset pagination of scans
+    ("CREATE INDEX IF NOT EXISTS idx_anomalies_status ON anomalies(status)",),
+    # 3: change feed. Triggers append to change_log inside the writing
+    # transaction, so a rolled-back deployment leaves no entries behind.
+    (
+        "CREATE TABLE IF NOT EXISTS change_log (seq INTEGER PRIMARY KEY AUTOINCREMENT, entity TEXT NOT NULL, entity_id INTEGER NOT NULL, old_status TEXT, status TEXT, changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')))",
+        "CREATE TRIGGER IF NOT EXISTS anomalies_log_insert AFTER INSERT ON anomalies BEGIN INSERT INTO change_log (entity, entity_id, status) VALUES ('anomaly', NEW.id, NEW.status); END",
+        "CREATE TRIGGER IF NOT EXISTS anomalies_log_status AFTER UPDATE OF status ON anomalies WHEN OLD.status IS NOT NEW.status BEGIN INSERT INTO change_log (entity, entity_id, old_status, status) VALUES ('anomaly', NEW.id, OLD.status, NEW.status); END",
+        "CREATE TRIGGER IF NOT EXISTS hunters_log_insert AFTER INSERT ON hunters BEGIN INSERT INTO change_log (entity, entity_id, status) VALUES ('hunter', NEW.id, NEW.status); END",
+        "CREATE TRIGGER IF NOT EXISTS hunters_log_status AFTER UPDATE OF status ON hunters WHEN OLD.status IS NOT NEW.status BEGIN INSERT INTO change_log (entity, entity_id, old_status, status) VALUES ('hunter', NEW.id, OLD.status, NEW.status); END",
+    ),
+]
+
+
+def migrate(conn):
+    """Applies pending migrations; must run inside a transaction."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, steps in enumerate(MIGRATIONS[current:], start=current + 1):
+        for step in steps:
+            step(conn) if callable(step) else conn.execute(step)
+        conn.execute(f"PRAGMA user_version = {version}")
+        logger.info(f"Applied schema migration {version}.")
+    return len(MIGRATIONS)
+
+
+class Database:
+    """Bounded SQLite connection pool whose queries run off the event loop.
+
+    Every call is executed on a dedicated thread pool with one worker per
+    connection, so a slow query only occupies its own worker and the MCP
+    server keeps serving other tool calls.
+    """
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="campus-db"
+        )
+
+    def _connect(self):
+        try:
+            # Autocommit mode: transactions are opened explicitly by `transaction`.
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to connect to database {self.path}: {e}")
+            raise
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    def _call(self, fn, args):
+        conn = self._acquire()
+        try:
+            return fn(conn, *args)
+        finally:
+            self._idle.put(conn)
+
+    def _call_in_transaction(self, fn, args):
+        def run(conn, *args):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+        return self._call(run, args)
+
+    async def run(self, fn, *args):
+        """Runs `fn(conn, *args)` on a pooled connection in the DB thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    async def transaction(self, fn, *args):
+        """Like `run`, but inside BEGIN IMMEDIATE ... COMMIT (rolled back on error)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._call_in_transaction, fn, args
+        )
+
+    async def migrate(self):
+        """Brings the schema up to date; returns the resulting schema version."""
+        version = await self.transaction(migrate)
+        await self.run(lambda conn: conn.execute("PRAGMA optimize"))
+        return version
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql, params=()):
+        """Executes a single write statement and returns the affected row count."""
+        return await self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+
+class QueryCache:
+    """In-process LRU cache of read-query results for a `Database`.
+
+    The server calls `invalidate` after each of its own writes. Writes from
+    other processes are caught by comparing `PRAGMA data_version` on a
+    dedicated probe connection before every lookup; that check reads the WAL
+    index in shared memory, so a cache hit never touches the database file.
+    The probe runs on the database thread pool, never on the event loop.
+    """
+
+    def __init__(self, db, max_entries=256):
+        self.db = db
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.external_invalidations = 0
+
+        self._entries = OrderedDict()
+        # Bumped on every invalidation so a query that was already running
+        # when the data changed does not store its (possibly stale) result.
+        self._generation = 0
+        self._data_version = None
+        # data_version is per connection, so one probe connection is kept and
+        # shared (under a lock) by the pool threads.
+        self._probe = None
+        self._probe_lock = threading.Lock()
+
+    def _read_data_version(self):
+        with self._probe_lock:
+            if self._probe is None:
+                self._probe = sqlite3.connect(self.db.path, check_same_thread=False)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    async def _check_data_version(self):
+        loop = asyncio.get_running_loop()
+        version = await loop.run_in_executor(self.db._executor, self._read_data_version)
+        if version != self._data_version:
+            if self._entries:
+                self.external_invalidations += 1
+            self._clear()
+            self._data_version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    async def fetchall(self, sql, params=()):
+        key = (sql, tuple(params))
+        await self._check_data_version()
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        generation = self._generation
+        rows = await self.db.fetchall(sql, params)
+        if generation == self._generation:
+            self._entries[key] = rows
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rows
+
+    def invalidate(self):
+        """Drops every cached result; call after each committed write."""
+        self.invalidations += 1
+        self._clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+            "external_invalidations": self.external_invalidations,
+        }
+
+    def close(self):
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        self._clear()
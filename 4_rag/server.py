@@ -1,6 +1,16 @@
+import argparse
+import asyncio
+import json
+import os
 import sqlite3
 import logging
+from contextlib import asynccontextmanager
+from typing import Literal
+
 from fastmcp import FastMCP, Context
+from pydantic import BaseModel, Field
+
+from campus_db import Database, QueryCache
 
 # --- 1. Configure Logging ---
 logging.basicConfig(
@@ -11,50 +21,190 @@ logging.basicConfig(
 )
 logger = logging.getLogger("CampusDefenderOps")
 
-# Initialize FastMCP
-mcp = FastMCP("CampusDefenderOps")
-DB_FILE = "campus.db"
+# Read from the environment so every HTTP worker process opens the same file.
+DB_FILE = os.environ.get("CAMPUS_DB", "campus.db")
+DB_POOL_SIZE = 4
+MAX_PAGE_SIZE = 100
+MAX_WAIT_SECONDS = 60
+# How often long-polls re-check the change log for writes by other processes.
+CHANGE_POLL_INTERVAL = 1.0
+
+# Shared connection pool; queries run on its worker threads, not the event loop.
+db = Database(DB_FILE, pool_size=DB_POOL_SIZE)
+# Results of the read tools, dropped by every write made through this server.
+cache = QueryCache(db)
 
 
-def get_db_connection():
-    """Helper to connect to the real database."""
+@asynccontextmanager
+async def lifespan(server):
+    version = await db.migrate()
+    logger.info(f"Database {DB_FILE} is at schema version {version}.")
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except sqlite3.Error as e:
-        logger.error(f"Failed to connect to database {DB_FILE}: {e}")
-        raise
+        yield
+    finally:
+        cache.close()
+        db.close()
+
+
+# Initialize FastMCP
+mcp = FastMCP("CampusDefenderOps", lifespan=lifespan)
+
+# Notified after every write this server commits; wakes up wait_for_changes.
+changes = asyncio.Condition()
+
+
+async def _notify_changes():
+    """Call after every committed write: drops cached reads, wakes long-polls."""
+    cache.invalidate()
+    async with changes:
+        changes.notify_all()
+
+
+def _page(rows, limit):
+    """Splits a LIMIT n+1 result into (page, next_cursor)."""
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1]["id"]
+    return rows, None
+
+
+def _to_json(key, rows, next_cursor):
+    return json.dumps(
+        {key: [dict(row) for row in rows], "next_cursor": next_cursor},
+        separators=(",", ":"),
+    )
 
 
 @mcp.tool()
-async def scan_active_threats(ctx: Context) -> str:
-    """Scans the campus database for ACTIVE anomalies and returns their details."""
+async def scan_active_threats(
+    ctx: Context,
+    limit: int = 20,
+    cursor: int | None = None,
+    min_danger: int | None = None,
+    location: str | None = None,
+    output: Literal["text", "json"] = "text",
+) -> str:
+    """
+    Scans the campus database for ACTIVE anomalies and returns their details.
+    Results are paged by threat ID: pass the returned cursor to get the next
+    page. Optionally filter by minimum danger level or exact location.
+    """
     logger.info("Tool called: scan_active_threats")
 
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    sql = "SELECT id, type, location, danger_level FROM anomalies WHERE status='ACTIVE' AND id > ?"
+    params = [cursor or 0]
+    if min_danger is not None:
+        sql += " AND danger_level >= ?"
+        params.append(min_danger)
+    if location is not None:
+        sql += " AND location = ?"
+        params.append(location)
+    sql += " ORDER BY id LIMIT ?"
+    params.append(limit + 1)
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM anomalies WHERE status='ACTIVE'")
-        rows = cursor.fetchall()
-        conn.close()
+        rows, next_cursor = _page(await cache.fetchall(sql, params), limit)
+
+        if output == "json":
+            return _to_json("threats", rows, next_cursor)
 
         if not rows:
             logger.info("Scan complete: No active threats found.")
+            if cursor:
+                return "🟢 No more active threats."
             await ctx.info("No active threats detected on campus.")
             return "🟢 ALL CLEAR. No active threats detected on campus."
 
-        logger.warning(f"Scan complete: {len(rows)} active threats detected.")
-        report = "🔴 ACTIVE THREATS DETECTED:\n"
-        for row in rows:
-            report += f"- [ID: {row['id']}] {row['type']} at {row['location']} (Danger: {row['danger_level']}/10)\n"
-        return report
+        logger.warning(f"Scan complete: {len(rows)} active threats on this page.")
+        lines = ["🔴 ACTIVE THREATS DETECTED:"]
+        lines += [
+            f"- [ID: {row['id']}] {row['type']} at {row['location']} (Danger: {row['danger_level']}/10)"
+            for row in rows
+        ]
+        if next_cursor:
+            lines.append(
+                f"More threats available: call again with cursor={next_cursor}."
+            )
+        return "\n".join(lines) + "\n"
 
     except Exception as e:
         logger.error(f"Error executing scan_active_threats: {e}", exc_info=True)
         return "❌ Internal System Error while scanning for threats."
 
 
+class Deployment(BaseModel):
+    threat_id: int = Field(description="ID of the threat to neutralize.")
+    hunter_name: str = Field(description="Name of the hunter to dispatch.")
+
+
+def _deploy(conn, threat_id, hunter_name):
+    """Assigns one hunter to one threat; must run inside a transaction.
+
+    Both rows are claimed with conditional updates, so a hunter that another
+    agent just deployed (or a threat that was just neutralized) is never
+    claimed twice. Returns (outcome, current_status).
+    """
+    conn.execute("SAVEPOINT deploy")
+
+    # Set Hunter to Busy, but only if they are still available
+    claimed = conn.execute(
+        "UPDATE hunters SET status='BUSY' WHERE name = ? AND status='AVAILABLE'",
+        (hunter_name,),
+    ).rowcount
+    if claimed:
+        # Neutralize Threat, but only if it is still active
+        neutralized = conn.execute(
+            "UPDATE anomalies SET status='NEUTRALIZED' WHERE id = ? AND status='ACTIVE'",
+            (threat_id,),
+        ).rowcount
+        if neutralized:
+            conn.execute("RELEASE deploy")
+            return "DEPLOYED", None
+
+    # Something was not claimable: undo the partial update and find out why.
+    conn.execute("ROLLBACK TO deploy")
+    conn.execute("RELEASE deploy")
+    if not claimed:
+        hunter = conn.execute(
+            "SELECT status FROM hunters WHERE name = ?", (hunter_name,)
+        ).fetchone()
+        if not hunter:
+            return "HUNTER_NOT_FOUND", None
+        return "HUNTER_UNAVAILABLE", hunter["status"]
+
+    threat = conn.execute(
+        "SELECT status FROM anomalies WHERE id = ?", (threat_id,)
+    ).fetchone()
+    if not threat:
+        return "THREAT_NOT_FOUND", None
+    return "THREAT_NOT_ACTIVE", threat["status"]
+
+
+def _deploy_many(conn, deployments):
+    return [_deploy(conn, d.threat_id, d.hunter_name) for d in deployments]
+
+
+def _describe_deployment(threat_id, hunter_name, outcome, status):
+    if outcome == "DEPLOYED":
+        logger.info(f"Mission Success: {hunter_name} neutralized Threat #{threat_id}.")
+        return f"🚀 MISSION SUCCESS: {hunter_name} has successfully neutralized Threat #{threat_id}. Database updated."
+
+    if outcome == "HUNTER_NOT_FOUND":
+        logger.warning(f"Deployment failed: Hunter '{hunter_name}' not found.")
+        return f"❌ ERROR: Hunter '{hunter_name}' not found in registry."
+
+    if outcome == "HUNTER_UNAVAILABLE":
+        logger.warning(f"Deployment failed: Hunter '{hunter_name}' is {status}.")
+        return f"⚠️ Hunter '{hunter_name}' is currently {status} and cannot be deployed."
+
+    if outcome == "THREAT_NOT_FOUND":
+        logger.warning(f"Deployment failed: Threat ID {threat_id} not found.")
+        return f"❌ ERROR: Threat ID {threat_id} not found."
+
+    logger.warning(f"Deployment failed: Threat ID {threat_id} is {status}.")
+    return f"⚠️ Threat #{threat_id} is already {status}. No hunter was deployed."
+
+
 @mcp.tool()
 async def deploy_hunter(
     threat_id: int,
@@ -70,52 +220,48 @@ async def deploy_hunter(
     )
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        outcome, status = await db.transaction(_deploy, threat_id, hunter_name)
+        message = _describe_deployment(threat_id, hunter_name, outcome, status)
 
-        # Check Hunter Status
-        cursor.execute("SELECT status FROM hunters WHERE name = ?", (hunter_name,))
-        hunter = cursor.fetchone()
-
-        if not hunter:
-            conn.close()
-            logger.warning(f"Deployment failed: Hunter '{hunter_name}' not found.")
-            return f"❌ ERROR: Hunter '{hunter_name}' not found in registry."
-
-        if hunter["status"] != "AVAILABLE":
-            conn.close()
-            logger.warning(
-                f"Deployment failed: Hunter '{hunter_name}' is {hunter['status']}."
+        if outcome == "DEPLOYED":
+            await _notify_changes()
+            await ctx.info(
+                f"Hunter '{hunter_name}' has successfully neutralized Threat #{threat_id}."
             )
-            return f"⚠️ Hunter '{hunter_name}' is currently {hunter['status']} and cannot be deployed."
-
-        # Neutralize Threat
-        cursor.execute(
-            "UPDATE anomalies SET status='NEUTRALIZED' WHERE id = ?", (threat_id,)
-        )
-        if cursor.rowcount == 0:
-            conn.close()
-            logger.warning(f"Deployment failed: Threat ID {threat_id} not found.")
-            return f"❌ ERROR: Threat ID {threat_id} not found."
-
-        # Set Hunter to Busy
-        cursor.execute(
-            "UPDATE hunters SET status='BUSY' WHERE name = ?", (hunter_name,)
-        )
-        conn.commit()
-        conn.close()
-
-        logger.info(f"Mission Success: {hunter_name} neutralized Threat #{threat_id}.")
-        await ctx.info(
-            f"Hunter '{hunter_name}' has successfully neutralized Threat #{threat_id}."
-        )
-        return f"🚀 MISSION SUCCESS: {hunter_name} has successfully neutralized Threat #{threat_id}. Database updated."
+        return message
 
     except Exception as e:
         logger.error(f"Error executing deploy_hunter: {e}", exc_info=True)
         return "❌ Internal System Error during deployment."
 
 
+@mcp.tool()
+async def deploy_many(deployments: list[Deployment], ctx: Context) -> str:
+    """
+    Dispatches several hunters at once, one (threat_id, hunter_name) pair each.
+    All pairs are applied in a single transaction; each one succeeds or fails
+    on its own, and the result lists the outcome for every pair.
+    """
+    logger.info(f"Tool called: deploy_many ({len(deployments)} deployments)")
+
+    try:
+        outcomes = await db.transaction(_deploy_many, deployments)
+
+        deployed = sum(outcome == "DEPLOYED" for outcome, _ in outcomes)
+        if deployed:
+            await _notify_changes()
+        await ctx.info(f"{deployed}/{len(deployments)} deployments succeeded.")
+        report = f"📋 DEPLOYMENT RESULTS ({deployed}/{len(deployments)} succeeded):\n"
+        for d, (outcome, status) in zip(deployments, outcomes):
+            message = _describe_deployment(d.threat_id, d.hunter_name, outcome, status)
+            report += f"- {message}\n"
+        return report
+
+    except Exception as e:
+        logger.error(f"Error executing deploy_many: {e}", exc_info=True)
+        return "❌ Internal System Error during bulk deployment."
+
+
 @mcp.tool()
 async def recruit_new_hunter(
     name: str,
@@ -128,15 +274,12 @@ async def recruit_new_hunter(
     await ctx.info(f"Tool called: recruit_new_hunter (Name: {name}, Major: {major})")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
+        await db.execute(
             "INSERT INTO hunters (name, major, equipment, status) VALUES (?, ?, ?, ?)",
             (name, major, equipment, "AVAILABLE"),
         )
-        conn.commit()
-        conn.close()
 
+        await _notify_changes()
         logger.info(f"Recruitment successful: {name} added to database.")
         await ctx.info(f"New recruit '{name}' has joined the hunter roster.")
         return f"✅ NEW RECRUIT: {name} ({major}) added to the roster with {equipment}."
@@ -152,34 +295,181 @@ async def recruit_new_hunter(
 
 
 @mcp.tool()
-async def list_available_hunters(ctx: Context) -> str:
-    """Lists all students currently available for missions."""
+async def list_available_hunters(
+    ctx: Context,
+    limit: int = 20,
+    cursor: int | None = None,
+    output: Literal["text", "json"] = "text",
+) -> str:
+    """
+    Lists students currently available for missions.
+    Results are paged: pass the returned cursor to get the next page.
+    """
     logger.info("Tool called: list_available_hunters")
     await ctx.info("Tool called: list_available_hunters")
 
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM hunters WHERE status='AVAILABLE'")
-        rows = cursor.fetchall()
-        conn.close()
+        rows, next_cursor = _page(
+            await cache.fetchall(
+                "SELECT id, name, major, equipment FROM hunters "
+                "WHERE status='AVAILABLE' AND id > ? ORDER BY id LIMIT ?",
+                (cursor or 0, limit + 1),
+            ),
+            limit,
+        )
+
+        if output == "json":
+            return _to_json("hunters", rows, next_cursor)
 
         if not rows:
             logger.info("Query complete: No hunters available.")
             await ctx.info("Query complete: No hunters available.")
-            return "⚠️ NO HUNTERS AVAILABLE."
+            return (
+                "⚠️ NO MORE HUNTERS AVAILABLE." if cursor else "⚠️ NO HUNTERS AVAILABLE."
+            )
 
-        logger.info(f"Query complete: Found {len(rows)} available hunters.")
+        logger.info(
+            f"Query complete: Found {len(rows)} available hunters on this page."
+        )
         await ctx.info(f"Query complete: Found {len(rows)} available hunters.")
-        roster = "🛡️ AVAILABLE HUNTERS:\n"
-        for row in rows:
-            roster += f"- {row['name']} ({row['major']}) | Gear: {row['equipment']}\n"
-        return roster
+        lines = ["🛡️ AVAILABLE HUNTERS:"]
+        lines += [
+            f"- {row['name']} ({row['major']}) | Gear: {row['equipment']}"
+            for row in rows
+        ]
+        if next_cursor:
+            lines.append(
+                f"More hunters available: call again with cursor={next_cursor}."
+            )
+        return "\n".join(lines) + "\n"
 
     except Exception as e:
         logger.error(f"Error executing list_available_hunters: {e}", exc_info=True)
         return "❌ Internal System Error while fetching roster."
 
 
+@mcp.tool()
+async def cache_stats() -> str:
+    """Returns hit/miss counters of the read-tool cache as JSON."""
+    logger.info("Tool called: cache_stats")
+    return json.dumps(cache.stats(), separators=(",", ":"))
+
+
+def _changes_since(conn, since, limit):
+    rows = conn.execute(
+        "SELECT seq, entity, entity_id, old_status, status, changed_at "
+        "FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit),
+    ).fetchall()
+    # With no new rows, hand back the caller's cursor so it can poll again.
+    return rows, rows[-1]["seq"] if rows else since
+
+
+def _changes_to_json(rows, last_seq):
+    return json.dumps(
+        {"changes": [dict(row) for row in rows], "last_seq": last_seq},
+        separators=(",", ":"),
+    )
+
+
+@mcp.tool()
+async def get_changes_since(since: int = 0, limit: int = 100) -> str:
+    """
+    Returns anomaly and hunter status changes with sequence number > `since`,
+    oldest first, as JSON. Pass the returned `last_seq` as `since` next time
+    instead of re-scanning all active threats.
+    """
+    logger.info(f"Tool called: get_changes_since (since={since})")
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        return _changes_to_json(*await db.run(_changes_since, since, limit))
+    except Exception as e:
+        logger.error(f"Error executing get_changes_since: {e}", exc_info=True)
+        return "❌ Internal System Error while reading the change feed."
+
+
+@mcp.tool()
+async def wait_for_changes(since: int, timeout: float = 30) -> str:
+    """
+    Long-poll version of get_changes_since: waits up to `timeout` seconds
+    for a change after `since` and returns as soon as one is committed.
+    Returns an empty change list if nothing happened in that time.
+    """
+    logger.info(f"Tool called: wait_for_changes (since={since}, timeout={timeout})")
+
+    deadline = asyncio.get_running_loop().time() + max(
+        0, min(timeout, MAX_WAIT_SECONDS)
+    )
+    try:
+        while True:
+            rows, last_seq = await db.run(_changes_since, since, MAX_PAGE_SIZE)
+            remaining = deadline - asyncio.get_running_loop().time()
+            if rows or remaining <= 0:
+                return _changes_to_json(rows, last_seq)
+            # Woken early by writes from this server; the poll interval
+            # catches writes made by other processes sharing the database.
+            async with changes:
+                try:
+                    await asyncio.wait_for(
+                        changes.wait(), min(remaining, CHANGE_POLL_INTERVAL)
+                    )
+                except TimeoutError:
+                    pass
+    except Exception as e:
+        logger.error(f"Error executing wait_for_changes: {e}", exc_info=True)
+        return "❌ Internal System Error while waiting for changes."
+
+
+@mcp.resource("campus://changes/{since}", mime_type="application/json")
+async def changes_resource(since: int) -> str:
+    """Anomaly and hunter status changes after sequence number `since`."""
+    return _changes_to_json(*await db.run(_changes_since, int(since), MAX_PAGE_SIZE))
+
+
+def create_app():
+    """ASGI app for the HTTP transport; uvicorn calls this once per worker.
+
+    Stateless mode keeps no MCP session state in the worker, so any worker
+    can answer any request and clients can be load-balanced freely. Workers
+    share the database; QueryCache and the change feed pick up each other's
+    writes through the database itself.
+    """
+    return mcp.http_app(stateless_http=True)
+
+
 if __name__ == "__main__":
-    mcp.run(log_level="INFO")
+    parser = argparse.ArgumentParser(description="Campus Defender Ops MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=4, help="worker processes for --transport http"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=10,
+        help="seconds to let in-flight requests finish on shutdown",
+    )
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        mcp.run(log_level="INFO")
+    else:
+        import uvicorn
+
+        # Serves http://<host>:<port>/mcp. SIGINT/SIGTERM stop accepting new
+        # connections and wait for running tool calls before workers exit.
+        uvicorn.run(
+            "server:create_app",
+            factory=True,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level="info",
+        )
@@ -1,3 +1,94 @@
-from .vault_loader import load_vault_env
+import importlib
 
-__all__ = ["load_vault_env"]
+# Exports are imported on first use: the retrieval modules pull in qdrant_client,
+# NumPy and LangChain, which callers such as the deep research agent never need.
+_EXPORTS = {
+    "BM25Index": ".bm25",
+    "DiskCache": ".cache",
+    "compact_checkpoints": ".checkpointing",
+    "NearDuplicateFilter": ".dedup",
+    "split_snippets": ".dedup",
+    "EmbeddingCache": ".embedding_cache",
+    "HybridHit": ".hybrid_search",
+    "HybridRetriever": ".hybrid_search",
+    "reciprocal_rank_fusion": ".hybrid_search",
+    "ingest_stream": ".ingestion",
+    "iter_documents": ".ingestion",
+    "sync_documents": ".ingestion",
+    "LLMCache": ".llm_cache",
+    "LocalVectorStore": ".local_vector_store",
+    "aretry_with_backoff": ".rate_limit",
+    "is_rate_limit_error": ".rate_limit",
+    "retry_with_backoff": ".rate_limit",
+    "RetrievalQuery": ".retrieval",
+    "batch_similarity_search": ".retrieval",
+    "category_filter": ".retrieval",
+    "format_hits": ".retrieval",
+    "make_batch_retrieval_tool": ".retrieval",
+    "make_retrieval_tool": ".retrieval",
+    "bm25_path": ".retrieval_service",
+    "get_embeddings": ".retrieval_service",
+    "get_llm": ".retrieval_service",
+    "get_qdrant_client": ".retrieval_service",
+    "get_retriever": ".retrieval_service",
+    "warm_up": ".retrieval_service",
+    "SearchCache": ".search_cache",
+    "SearchCacheMiss": ".search_cache",
+    "Telemetry": ".telemetry",
+    "estimate_cost": ".telemetry",
+    "count_tokens": ".tokens",
+    "truncate_to_tokens": ".tokens",
+    "load_vault_env": ".vault_loader",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
+
+
+__all__ = [
+    "BM25Index",
+    "DiskCache",
+    "EmbeddingCache",
+    "HybridHit",
+    "HybridRetriever",
+    "LLMCache",
+    "LocalVectorStore",
+    "NearDuplicateFilter",
+    "RetrievalQuery",
+    "SearchCache",
+    "SearchCacheMiss",
+    "Telemetry",
+    "aretry_with_backoff",
+    "batch_similarity_search",
+    "bm25_path",
+    "category_filter",
+    "compact_checkpoints",
+    "count_tokens",
+    "estimate_cost",
+    "format_hits",
+    "get_embeddings",
+    "get_llm",
+    "get_qdrant_client",
+    "get_retriever",
+    "ingest_stream",
+    "is_rate_limit_error",
+    "iter_documents",
+    "load_vault_env",
+    "make_batch_retrieval_tool",
+    "make_retrieval_tool",
+    "reciprocal_rank_fusion",
+    "retry_with_backoff",
+    "split_snippets",
+    "sync_documents",
+    "truncate_to_tokens",
+    "warm_up",
+]
@@ -0,0 +1,185 @@
+import heapq
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from .local_vector_store import filter_conditions
+
+# Keeps IDs like "SEC-03" or "code_review" together; their parts are indexed too.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+# Question words and modal verbs ("How long must passwords be?") occur in most
+# policies; matching on them alone would pull unrelated documents in.
+STOPWORDS = frozenset(
+    "a about after all also am an and any are as at be been being but by can "
+    "could did do does doing for from had has have how i if in into is it its "
+    "may me might must my no not of on or our s shall should so such t than that "
+    "the their them then there these they this those to under up was we were "
+    "what when where which who whom why will with would you your".split()
+)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "-" in token or "_" in token:
+            tokens.extend(
+                part for part in re.split(r"[-_]", token) if part not in STOPWORDS
+            )
+    return tokens
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over documents and selected metadata.
+
+    `page_content` plus the metadata `fields` (policy ID, topic) are indexed,
+    so exact-term questions such as "AGPL" or "SEC-03" find their policy even
+    when the dense embedding does not rank it. Documents are keyed by id;
+    adding an existing id replaces it.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, fields=("policy_id", "topic")):
+        self.k1 = k1
+        self.b = b
+        self.fields = tuple(fields)
+        self._postings = defaultdict(dict)
+        self._docs = []
+        self._lengths = []
+        self._rows = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def documents(self):
+        return [doc for doc in self._docs if doc is not None]
+
+    def _terms(self, doc):
+        extra = [str(doc.metadata[f]) for f in self.fields if f in doc.metadata]
+        return Counter(tokenize(" ".join([doc.page_content, *extra])))
+
+    def add_documents(self, documents, ids=None):
+        ids = ids or [doc.id for doc in documents]
+        for doc_id, doc in zip(ids, documents, strict=True):
+            doc_id = str(doc_id)
+            self.delete([doc_id])
+            row = len(self._docs)
+            terms = self._terms(doc)
+            for term, tf in terms.items():
+                self._postings[term][row] = tf
+            length = sum(terms.values())
+            self._docs.append(
+                Document(
+                    page_content=doc.page_content, metadata=doc.metadata, id=doc_id
+                )
+            )
+            self._lengths.append(length)
+            self._rows[doc_id] = row
+            self._total_length += length
+
+    def delete(self, ids):
+        for doc_id in ids:
+            row = self._rows.pop(str(doc_id), None)
+            if row is None:
+                continue
+            for term in self._terms(self._docs[row]):
+                self._postings[term].pop(row, None)
+                if not self._postings[term]:
+                    del self._postings[term]
+            self._total_length -= self._lengths[row]
+            self._docs[row] = None
+
+    def search(self, query, k=10, filter=None):
+        """Returns up to `k` (Document, BM25 score) pairs, best first."""
+        if not self._rows:
+            return []
+        n_docs = len(self._rows)
+        avg_length = self._total_length / n_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[row] / avg_length)
+                scores[row] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        candidates = scores.items()
+        if filter:
+            conditions = filter_conditions(filter)
+            candidates = [
+                (row, score)
+                for row, score in candidates
+                if all(
+                    self._docs[row].metadata.get(field) in values
+                    for field, values in conditions
+                )
+            ]
+        top = heapq.nlargest(k, candidates, key=itemgetter(1))
+        return [(self._docs[row], score) for row, score in top]
+
+    # --- persistence -------------------------------------------------------
+
+    def save(self, path):
+        """Writes the indexed documents as JSON; the index is rebuilt on load."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "fields": list(self.fields),
+            "documents": [
+                {
+                    "id": doc.id,
+                    "page_content": doc.page_content,
+                    "metadata": doc.metadata,
+                }
+                for doc in self.documents()
+            ],
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        payload = json.loads(Path(path).read_text())
+        index = cls(payload["k1"], payload["b"], payload["fields"])
+        index.add_documents(
+            [
+                Document(page_content=d["page_content"], metadata=d["metadata"])
+                for d in payload["documents"]
+            ],
+            [d["id"] for d in payload["documents"]],
+        )
+        return index
+
+    @classmethod
+    def from_qdrant(cls, client, collection_name, batch_size=1024, **kwargs):
+        """Indexes the payloads of a collection written by QdrantVectorStore."""
+        index = cls(**kwargs)
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name, limit=batch_size, offset=offset, with_payload=True
+            )
+            index.add_documents(
+                [
+                    Document(
+                        page_content=p.payload.get("page_content", ""),
+                        metadata=p.payload.get("metadata") or {},
+                    )
+                    for p in points
+                ],
+                [str(p.id) for p in points],
+            )
+            if offset is None:
+                return index
@@ -0,0 +1,51 @@
+import sqlite3
+from pathlib import Path
+
+
+def compact_checkpoints(path, keep_threads=20):
+    """Applies the retention policy to a LangGraph SQLite checkpoint database.
+
+    - Only the `keep_threads` most recently active threads are kept.
+    - Within a kept thread, only the latest checkpoint of each namespace (the
+      parent graph and every child graph) is kept, together with its pending
+      writes. That is all LangGraph needs to resume the thread.
+    - The file is vacuumed afterwards so the freed pages are returned to disk.
+
+    Returns the number of deleted checkpoints.
+    """
+    if not Path(path).exists():
+        return 0
+
+    conn = sqlite3.connect(path)
+    try:
+        # Checkpoint ids are time-ordered UUIDs, so MAX() is the most recent one.
+        stale_threads = [
+            row[0]
+            for row in conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id "
+                "ORDER BY MAX(checkpoint_id) DESC LIMIT -1 OFFSET ?",
+                (keep_threads,),
+            )
+        ]
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ?",
+            [(thread_id,) for thread_id in stale_threads],
+        )
+        conn.execute(
+            "DELETE FROM checkpoints WHERE checkpoint_id < ("
+            "SELECT MAX(latest.checkpoint_id) FROM checkpoints AS latest "
+            "WHERE latest.thread_id = checkpoints.thread_id "
+            "AND latest.checkpoint_ns = checkpoints.checkpoint_ns)"
+        )
+        deleted = conn.execute("SELECT changes()").fetchone()[0]
+        conn.execute(
+            "DELETE FROM writes WHERE NOT EXISTS ("
+            "SELECT 1 FROM checkpoints AS c WHERE c.thread_id = writes.thread_id "
+            "AND c.checkpoint_ns = writes.checkpoint_ns "
+            "AND c.checkpoint_id = writes.checkpoint_id)"
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+        return deleted
+    finally:
+        conn.close()
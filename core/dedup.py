@@ -0,0 +1,50 @@
+import re
+
+WORD_RE = re.compile(r"\w+")
+
+
+def split_snippets(text):
+    """Splits findings text into blank-line separated snippets."""
+    return [part.strip() for part in re.split(r"\n\s*\n", text) if part.strip()]
+
+
+class NearDuplicateFilter:
+    """Drops snippets whose word shingles mostly overlap a snippet seen before.
+
+    A snippet counts as a duplicate when the share of its shingles already
+    present in an earlier snippet reaches `threshold`, which also catches a
+    shorter excerpt of an article that was already kept. Snippets shorter
+    than one shingle (headings, separators) are always kept.
+    """
+
+    def __init__(self, threshold=0.8, shingle_size=5):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._seen = []
+
+    def _shingles(self, text):
+        words = WORD_RE.findall(text.lower())
+        return {
+            hash(tuple(words[i : i + self.shingle_size]))
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def add(self, text):
+        """Records `text` and returns True, or returns False if it is a near-duplicate."""
+        shingles = self._shingles(text)
+        if not shingles:
+            return True
+
+        for seen in self._seen:
+            if len(shingles & seen) / len(shingles) >= self.threshold:
+                return False
+
+        self._seen.append(shingles)
+        return True
+
+    def filter(self, snippets):
+        """Returns (kept, dropped) lists, recording the kept snippets."""
+        kept, dropped = [], []
+        for snippet in snippets:
+            (kept if self.add(snippet) else dropped).append(snippet)
+        return kept, dropped
@@ -0,0 +1,271 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite's default limit on host parameters per statement is 999.
+_LOOKUP_CHUNK = 900
+
+
+class EmbeddingCache(Embeddings):
+    """Persistent cache in front of any LangChain `Embeddings`.
+
+    Vectors live in one memory-mapped float32 matrix (`vectors.f32`); a
+    SQLite index maps sha256(model, kind, text) to a row of it and tracks
+    last access for LRU eviction once `max_entries` is reached. Batch calls
+    look all texts up at once and forward only the (deduplicated) misses to
+    the wrapped model, in a single request.
+
+    Several processes may share one directory: every index access runs in a
+    BEGIN IMMEDIATE transaction, and the matrix is re-mapped when another
+    process has grown it.
+    """
+
+    def __init__(self, embeddings, path, max_entries=100_000):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly by `_transaction`.
+        self._index = sqlite3.connect(
+            self.path / "index.db", check_same_thread=False, isolation_level=None
+        )
+        self._index.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few LRU timestamps on power loss is harmless.
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._index.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries(accessed_at)"
+        )
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)"
+        )
+
+        self._vectors = None
+        self._dim = None
+        self._load_dim()
+        if self._dim and self._file_capacity():
+            self._open(self._file_capacity())
+
+    @contextmanager
+    def _transaction(self):
+        """Holds the thread lock and the database write lock until COMMIT."""
+        with self._lock:
+            self._index.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._index.execute("ROLLBACK")
+                raise
+            self._index.execute("COMMIT")
+
+    def _load_dim(self):
+        # Another process may have stored the first vectors since we opened.
+        if self._dim is None:
+            row = self._index.execute(
+                "SELECT value FROM meta WHERE name = 'dim'"
+            ).fetchone()
+            self._dim = row[0] if row else None
+
+    # --- vector file -------------------------------------------------------
+
+    @property
+    def _vector_file(self):
+        return self.path / "vectors.f32"
+
+    def _file_capacity(self):
+        size = self._vector_file.stat().st_size if self._vector_file.exists() else 0
+        return size // (self._dim * 4)
+
+    def _open(self, capacity):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        # Growing the file with truncate leaves a sparse file on most filesystems.
+        with open(self._vector_file, "ab") as f:
+            f.truncate(max(f.tell(), capacity * self._dim * 4))
+        self._vectors = np.memmap(
+            self._vector_file, dtype=np.float32, mode="r+", shape=(capacity, self._dim)
+        )
+
+    def _ensure_mapped(self, slot):
+        """Re-maps the file if `slot` lies past the end of the current mapping."""
+        if self._vectors is None or slot >= len(self._vectors):
+            self._open(max(slot + 1, self._file_capacity()))
+
+    def _reserve(self, count):
+        """Returns `count` free slots, evicting least recently used entries if needed.
+
+        Must run inside `_transaction`, so no other process takes the same slots.
+        """
+        used = self._index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        fresh = list(range(used, min(used + count, self.max_entries)))
+        if len(fresh) < count:
+            evicted = self._index.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at LIMIT ?) RETURNING slot",
+                (count - len(fresh),),
+            ).fetchall()
+            fresh += [slot for (slot,) in evicted]
+
+        if not fresh:
+            return fresh
+        capacity = self._file_capacity()
+        if max(fresh) >= capacity:
+            self._open(min(self.max_entries, max(1024, 2 * capacity, max(fresh) + 1)))
+        else:
+            self._ensure_mapped(max(fresh))
+        return fresh
+
+    # --- lookups -----------------------------------------------------------
+
+    def _key(self, kind, text):
+        return hashlib.sha256(f"{self.model}\0{kind}\0{text}".encode()).hexdigest()
+
+    def _lookup(self, kind, texts):
+        """Returns (vectors with None for misses, unique missing texts)."""
+        keys = [self._key(kind, text) for text in texts]
+        found = {}
+        # Held while reading the vectors so no other process evicts their slots.
+        with self._transaction():
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start : start + _LOOKUP_CHUNK]
+                found.update(
+                    self._index.execute(
+                        f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+            if found:
+                now = time.time()
+                self._index.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._load_dim()
+                self._ensure_mapped(max(found.values()))
+                rows = dict(
+                    zip(
+                        found, self._vectors[list(found.values())].tolist(), strict=True
+                    )
+                )
+            else:
+                rows = {}
+
+            vectors = [rows.get(key) for key in keys]
+            hits = sum(v is not None for v in vectors)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        missing = list(
+            dict.fromkeys(text for text, v in zip(texts, vectors) if v is None)
+        )
+        return vectors, missing
+
+    def _store(self, kind, texts, vectors):
+        if not texts:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._transaction():
+            self._load_dim()
+            if self._dim is None:
+                self._dim = array.shape[1]
+                self._index.execute(
+                    "INSERT INTO meta (name, value) VALUES ('dim', ?)", (self._dim,)
+                )
+            elif array.shape[1] != self._dim:
+                raise ValueError(
+                    f"{self.path} holds {self._dim}-d vectors, got {array.shape[1]}-d; "
+                    "use a separate cache directory per embedding model"
+                )
+
+            # Another caller may have stored some of these while we embedded.
+            keys = [self._key(kind, text) for text in texts]
+            present = set()
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                present.update(
+                    key
+                    for (key,) in self._index.execute(
+                        f"SELECT key FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+            new = [i for i, key in enumerate(keys) if key not in present]
+            # Never hold more than max_entries of this batch; keep the last ones.
+            new = new[-self.max_entries :]
+
+            if new:
+                slots = self._reserve(len(new))
+                self._vectors[slots] = array[new]
+                # Vectors reach the file before the index points at them.
+                self._vectors.flush()
+                now = time.time()
+                self._index.executemany(
+                    "INSERT INTO entries (key, slot, accessed_at) VALUES (?, ?, ?)",
+                    [(keys[i], slot, now) for i, slot in zip(new, slots, strict=True)],
+                )
+
+    @staticmethod
+    def _merge(vectors, texts, missing, fresh):
+        by_text = dict(zip(missing, fresh, strict=True))
+        return [v if v is not None else by_text[t] for t, v in zip(texts, vectors)]
+
+    # --- Embeddings interface ----------------------------------------------
+
+    def embed_documents(self, texts):
+        vectors, missing = self._lookup("document", texts)
+        fresh = self.embeddings.embed_documents(missing) if missing else []
+        self._store("document", missing, fresh)
+        return self._merge(vectors, texts, missing, fresh)
+
+    def embed_query(self, text):
+        vectors, missing = self._lookup("query", [text])
+        fresh = [self.embeddings.embed_query(text)] if missing else []
+        self._store("query", missing, fresh)
+        return self._merge(vectors, [text], missing, fresh)[0]
+
+    async def aembed_documents(self, texts):
+        vectors, missing = self._lookup("document", texts)
+        fresh = await self.embeddings.aembed_documents(missing) if missing else []
+        self._store("document", missing, fresh)
+        return self._merge(vectors, texts, missing, fresh)
+
+    async def aembed_query(self, text):
+        vectors, missing = self._lookup("query", [text])
+        fresh = [await self.embeddings.aembed_query(text)] if missing else []
+        self._store("query", missing, fresh)
+        return self._merge(vectors, [text], missing, fresh)[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._index.close()
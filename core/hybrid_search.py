@@ -0,0 +1,138 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from langchain_core.documents import Document
+
+from .retrieval import RetrievalQuery, batch_search_by_vectors, embed_queries
+
+
+class HybridHit(NamedTuple):
+    document: Document
+    score: float
+    vector_score: float | None
+    bm25_score: float | None
+
+
+def _doc_key(doc):
+    # QdrantVectorStore puts the point id in metadata; local stores use doc.id.
+    return str(doc.metadata.get("_id") or doc.id or doc.page_content)
+
+
+def reciprocal_rank_fusion(*rankings, k=60):
+    """Fuses ranked Document lists; returns [(key, fused score)] best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = _doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever:
+    """Dense vector search and BM25 run side by side, merged by rank fusion.
+
+    The query embedding and vector search (network round trips) run on a
+    worker thread while BM25 is scored in the calling thread. Each stage fetches
+    `candidates` results before fusion keeps the top `k`. BM25 hits scoring
+    under `min_keyword_score` are dropped, so documents that only share
+    common words with the question do not enter the fusion. The floor is
+    absolute: a match on one term found in under ~5% of the documents
+    clears the default, however weak the best hit of the question is.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        bm25,
+        candidates=20,
+        rrf_k=60,
+        min_keyword_score=3.0,
+        max_workers=8,
+    ):
+        self.vector_store = vector_store
+        self.bm25 = bm25
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.min_keyword_score = min_keyword_score
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hybrid-search"
+        )
+
+    @staticmethod
+    def _timed(fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, (time.perf_counter() - started) * 1e3
+
+    def _vector_stage(self, queries):
+        vectors, embed_ms = self._timed(
+            embed_queries, self.vector_store.embeddings, [q.question for q in queries]
+        )
+        results, vector_ms = self._timed(
+            batch_search_by_vectors,
+            self.vector_store,
+            vectors,
+            [q._replace(k=self.candidates) for q in queries],
+        )
+        return results, embed_ms, vector_ms
+
+    def _keyword_hits(self, query):
+        hits = self.bm25.search(query.question, k=self.candidates, filter=query.filter)
+        return [(doc, score) for doc, score in hits if score >= self.min_keyword_score]
+
+    def _fuse(self, vector_hits, bm25_hits, k):
+        docs, vector_scores, bm25_scores = {}, {}, {}
+        for doc, score in vector_hits:
+            docs.setdefault(_doc_key(doc), doc)
+            vector_scores[_doc_key(doc)] = score
+        for doc, score in bm25_hits:
+            docs.setdefault(_doc_key(doc), doc)
+            bm25_scores[_doc_key(doc)] = score
+
+        fused = reciprocal_rank_fusion(
+            [doc for doc, _ in vector_hits], [doc for doc, _ in bm25_hits], k=self.rrf_k
+        )
+        return [
+            HybridHit(docs[key], score, vector_scores.get(key), bm25_scores.get(key))
+            for key, score in fused[:k]
+        ]
+
+    def search_many(self, queries):
+        """Answers N (question, filter, k) queries: ([[HybridHit]], latency in ms).
+
+        All questions are embedded in one request and searched in one
+        batched vector query, so N lookups cost two round trips, not 2N.
+        """
+        queries = [RetrievalQuery(*q) for q in queries]
+        if not queries:
+            return [], {}
+        started = time.perf_counter()
+        vector_future = self._executor.submit(self._vector_stage, queries)
+        bm25_results, bm25_ms = self._timed(
+            lambda: [self._keyword_hits(q) for q in queries]
+        )
+        vector_results, embed_ms, vector_ms = vector_future.result()
+
+        fusion_started = time.perf_counter()
+        results = [
+            self._fuse(vector_hits, bm25_hits, query.k)
+            for query, vector_hits, bm25_hits in zip(
+                queries, vector_results, bm25_results, strict=True
+            )
+        ]
+        now = time.perf_counter()
+        timings = {
+            "queries": len(queries),
+            "embed_ms": round(embed_ms, 2),
+            "vector_ms": round(vector_ms, 2),
+            "bm25_ms": round(bm25_ms, 2),
+            "fusion_ms": round((now - fusion_started) * 1e3, 2),
+            "total_ms": round((now - started) * 1e3, 2),
+        }
+        return results, timings
+
+    def search(self, query, k=3, filter=None):
+        """Returns ([HybridHit], per-stage latency in ms)."""
+        results, timings = self.search_many([RetrievalQuery(query, filter, k)])
+        return results[0], timings
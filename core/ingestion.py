@@ -0,0 +1,330 @@
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from langchain_core.documents import Document
+from qdrant_client import models
+
+from .rate_limit import aretry_with_backoff
+from .tokens import get_encoding
+
+# Fixed namespace so the same document always maps to the same point ID.
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a7e-3b9d-5e4f-8a60-2d7c9b1e4f35")
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Record fields tried, in order, for the document text of JSONL/CSV sources.
+CONTENT_FIELDS = ("page_content", "content", "text")
+
+
+def document_key(doc):
+    """Stable identity of a document: its `policy_id`, else its content hash.
+
+    Without a `policy_id` an edited document gets a new key, so its old point
+    is only removed when ingesting with a manifest.
+    """
+    if "policy_id" in doc.metadata:
+        key = str(doc.metadata["policy_id"])
+        if "chunk" in doc.metadata:
+            key += f"#{doc.metadata['chunk']}"
+        return key
+    return content_hash(doc)
+
+
+def point_id(collection, key):
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{collection}:{key}"))
+
+
+def content_hash(doc):
+    payload = json.dumps(
+        {"page_content": doc.page_content, "metadata": doc.metadata}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IngestionManifest:
+    """JSON file of {collection: {point_id: content_hash}} for ingested documents."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._data = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def get(self, collection):
+        return dict(self._data.get(collection, {}))
+
+    def set(self, collection, hashes):
+        self._data[collection] = hashes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so an interrupted run never leaves a torn manifest.
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data, separators=(",", ":"), sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+def sync_documents(vector_store, docs, manifest_path, collection=None, full=False):
+    """Makes the collection match `docs`, embedding only new or changed ones.
+
+    Point IDs are derived from `document_key`, so re-ingesting a document
+    overwrites its point instead of adding a duplicate. Documents that were
+    ingested before but are missing from `docs` are deleted. With `full=True`
+    every document is upserted again regardless of its hash, e.g. after the
+    collection was recreated.
+
+    Identical copies of a document are skipped and counted as duplicates;
+    the same key with different content raises ValueError.
+
+    Returns counts of added, updated, unchanged, duplicate and deleted documents.
+    """
+    collection = collection or vector_store.collection_name
+    manifest = IngestionManifest(manifest_path)
+    previous = manifest.get(collection)
+
+    current = {}
+    pending_ids, pending_docs = [], []
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "deleted": 0}
+    for doc in docs:
+        pid = point_id(collection, document_key(doc))
+        digest = content_hash(doc)
+        if pid in current:
+            if current[pid] != digest:
+                raise ValueError(f"Duplicate document key: {document_key(doc)}")
+            stats["duplicates"] += 1
+            continue
+        current[pid] = digest
+
+        if not full and previous.get(pid) == current[pid]:
+            stats["unchanged"] += 1
+            continue
+        stats["updated" if pid in previous else "added"] += 1
+        pending_ids.append(pid)
+        pending_docs.append(doc)
+
+    removed = [pid for pid in previous if pid not in current]
+    if pending_docs:
+        vector_store.add_documents(pending_docs, ids=pending_ids)
+    if removed:
+        vector_store.delete(ids=removed)
+        stats["deleted"] = len(removed)
+
+    if pending_docs or removed or full:
+        manifest.set(collection, current)
+    return stats
+
+
+def _record_to_document(record, source):
+    for field in CONTENT_FIELDS:
+        if record.get(field):
+            content = record.pop(field)
+            break
+    else:
+        raise ValueError(f"{source}: record has none of the fields {CONTENT_FIELDS}")
+    metadata = record.pop("metadata", None) or record
+    return Document(page_content=content, metadata=metadata)
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                yield _record_to_document(json.loads(line), f"{path}:{line_no}")
+
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        for line_no, row in enumerate(csv.DictReader(f), 2):
+            yield _record_to_document(row, f"{path}:{line_no}")
+
+
+def _read_markdown(path):
+    yield Document(
+        page_content=path.read_text(),
+        metadata={"policy_id": str(path), "source": str(path)},
+    )
+
+
+READERS = {".jsonl": _read_jsonl, ".csv": _read_csv, ".md": _read_markdown}
+
+
+def iter_documents(paths):
+    """Lazily yields Documents from JSONL, CSV and Markdown files or directories.
+
+    JSONL and CSV records take their text from the first non-empty field in
+    CONTENT_FIELDS; the remaining fields (or a JSONL `metadata` object) become
+    the metadata. Each Markdown file is one document keyed by its path.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from iter_documents(
+                sorted(p for p in path.rglob("*") if p.suffix.lower() in READERS)
+            )
+        elif path.suffix.lower() in READERS:
+            yield from READERS[path.suffix.lower()](path)
+        else:
+            raise ValueError(f"Unsupported source file: {path}")
+
+
+def _chunk(docs, max_tokens, overlap, encoding):
+    """Splits documents into windows of at most `max_tokens` tokens.
+
+    Yields (document, token_count). Chunks of a split document get a `chunk`
+    index in their metadata, which makes them separate points.
+    """
+    step = max(1, max_tokens - overlap)
+    for doc in docs:
+        tokens = encoding.encode(doc.page_content)
+        if len(tokens) <= max_tokens:
+            yield doc, len(tokens)
+            continue
+        for i, start in enumerate(range(0, len(tokens) - overlap, step)):
+            window = tokens[start : start + max_tokens]
+            yield (
+                Document(
+                    page_content=encoding.decode(window),
+                    metadata={**doc.metadata, "chunk": i},
+                ),
+                len(window),
+            )
+
+
+async def ingest_stream(
+    vector_store,
+    docs,
+    manifest_path=None,
+    *,
+    full=False,
+    batch_size=256,
+    batch_tokens=100_000,
+    chunk_tokens=512,
+    chunk_overlap=64,
+    concurrency=4,
+    queue_size=8,
+    progress_every=5.0,
+    model=EMBEDDING_MODEL,
+):
+    """Chunks, embeds and upserts a (lazy) document stream into a Qdrant store.
+
+    Reading, embedding and upserting run as separate stages connected by
+    bounded queues, so memory stays flat however large the corpus is, and
+    `concurrency` embedding requests are kept in flight while earlier batches
+    are written. Batches hold at most `batch_size` chunks and `batch_tokens`
+    tokens to stay under the provider's per-request limits.
+
+    With a manifest, unchanged chunks are skipped and, once the stream is
+    exhausted, points of chunks that no longer exist are deleted, the same
+    as `sync_documents`; the stream is then taken to be the whole corpus.
+    Identical copies of a chunk are skipped and counted as duplicates.
+    """
+    collection = vector_store.collection_name
+    embeddings = vector_store.embeddings
+    encoding = get_encoding(model)
+    manifest = IngestionManifest(manifest_path) if manifest_path else None
+    previous = manifest.get(collection) if manifest else {}
+    hashes = dict(previous)
+    seen = {}
+    stats = Counter()
+
+    def batches():
+        batch, tokens = [], 0
+        for doc, n_tokens in _chunk(docs, chunk_tokens, chunk_overlap, encoding):
+            pid = point_id(collection, document_key(doc))
+            digest = content_hash(doc)
+            stats["chunks"] += 1
+            if pid in seen:
+                if seen[pid] != digest:
+                    raise ValueError(f"Duplicate document key: {document_key(doc)}")
+                stats["duplicates"] += 1
+                continue
+            seen[pid] = digest
+            if not full and previous.get(pid) == digest:
+                stats["unchanged"] += 1
+                continue
+            if batch and (len(batch) >= batch_size or tokens + n_tokens > batch_tokens):
+                yield batch
+                batch, tokens = [], 0
+            batch.append((pid, digest, doc))
+            tokens += n_tokens
+        if batch:
+            yield batch
+
+    to_embed = asyncio.Queue(queue_size)
+    to_upsert = asyncio.Queue(queue_size)
+
+    async def read():
+        # File reads and tokenization run in a thread to keep the loop free.
+        pending = batches()
+        while (batch := await asyncio.to_thread(next, pending, None)) is not None:
+            await to_embed.put(batch)
+        for _ in range(concurrency):
+            await to_embed.put(None)
+
+    async def embed():
+        while (batch := await to_embed.get()) is not None:
+            vectors = await aretry_with_backoff(
+                embeddings.aembed_documents, [doc.page_content for _, _, doc in batch]
+            )
+            stats["embedded"] += len(batch)
+            await to_upsert.put((batch, vectors))
+
+    async def upsert():
+        while (item := await to_upsert.get()) is not None:
+            batch, vectors = item
+            points = [
+                models.PointStruct(
+                    id=pid,
+                    vector={vector_store.vector_name: vector},
+                    payload={
+                        vector_store.content_payload_key: doc.page_content,
+                        vector_store.metadata_payload_key: doc.metadata,
+                    },
+                )
+                for (pid, _, doc), vector in zip(batch, vectors)
+            ]
+            await asyncio.to_thread(
+                vector_store.client.upsert, collection, points=points
+            )
+            hashes.update((pid, digest) for pid, digest, _ in batch)
+            stats["upserted"] += len(batch)
+            stats["batches"] += 1
+            # Checkpoint now and then so a crashed run does not redo everything.
+            if manifest and stats["batches"] % 50 == 0:
+                manifest.set(collection, hashes)
+
+    async def report():
+        while True:
+            await asyncio.sleep(progress_every)
+            elapsed = time.perf_counter() - started
+            print(
+                f"[Ingestion] {stats['chunks']} chunks read, {stats['unchanged']} unchanged, "
+                f"{stats['embedded']} embedded, {stats['upserted']} upserted "
+                f"({stats['upserted'] / elapsed:.0f}/s)"
+            )
+
+    started = time.perf_counter()
+    reporter = asyncio.create_task(report())
+    try:
+        # A failure in any stage cancels the others.
+        async with asyncio.TaskGroup() as stages:
+            stages.create_task(read())
+            embedders = [stages.create_task(embed()) for _ in range(concurrency)]
+            stages.create_task(upsert())
+            await asyncio.gather(*embedders)
+            await to_upsert.put(None)
+    finally:
+        reporter.cancel()
+
+    if manifest:
+        removed = [pid for pid in previous if pid not in seen]
+        if removed:
+            vector_store.delete(ids=removed)
+            for pid in removed:
+                del hashes[pid]
+            stats["deleted"] = len(removed)
+        manifest.set(collection, hashes)
+
+    stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return dict(stats)
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, defaultdict
+
+from langchain_core.load import dumpd
+from langchain_core.messages import AIMessage
+from pydantic import ValidationError
+
+from .cache import DiskCache
+
+
+class LLMCache:
+    """Two-tier (in-memory LRU + SQLite) cache for deterministic LLM calls.
+
+    Only models running at temperature 0 are cached. Structured-output calls
+    store the parsed object as JSON and re-validate it against the schema on
+    the way out, so a cached `Plan` is still a `Plan`.
+    """
+
+    def __init__(self, path, memory_size=256, ttl_seconds=None, max_entries=10_000):
+        self.memory_size = memory_size
+        self.disk = DiskCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self.node_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(llm, prompt, schema=None):
+        payload = json.dumps(
+            {
+                "model": getattr(llm, "model_name", None) or type(llm).__name__,
+                "prompt": prompt if isinstance(prompt, str) else dumpd(prompt),
+                "schema": schema.model_json_schema() if schema else None,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = self.disk.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _store(self, key, value):
+        self._remember(key, value)
+        self.disk.set(key, value)
+
+    def _record(self, node, hit):
+        with self._lock:
+            self.node_stats[node]["hits" if hit else "misses"] += 1
+
+    def invoke(self, llm, prompt, schema=None, node="default", config=None):
+        """Drop-in for `llm.invoke` / `llm.with_structured_output(schema).invoke`."""
+        runnable = llm.with_structured_output(schema) if schema else llm
+        if getattr(llm, "temperature", None) != 0:
+            return runnable.invoke(prompt, config=config)
+
+        key = self.make_key(llm, prompt, schema)
+        cached = self._lookup(key)
+        if cached is not None:
+            try:
+                result = (
+                    schema.model_validate(cached)
+                    if schema
+                    else AIMessage(content=cached)
+                )
+                self._record(node, hit=True)
+                return result
+            except ValidationError:
+                pass
+
+        self._record(node, hit=False)
+        result = runnable.invoke(prompt, config=config)
+        self._store(key, result.model_dump(mode="json") if schema else result.content)
+        return result
+
+    def batch(self, llm, prompts, schema=None, node="default", config=None):
+        """Like `invoke` for many prompts; only cache misses are sent, in one batch."""
+        runnable = llm.with_structured_output(schema) if schema else llm
+        if getattr(llm, "temperature", None) != 0:
+            return runnable.batch(prompts, config=config)
+
+        keys = [self.make_key(llm, prompt, schema) for prompt in prompts]
+        results = [None] * len(prompts)
+        for i, key in enumerate(keys):
+            cached = self._lookup(key)
+            if cached is None:
+                continue
+            try:
+                results[i] = (
+                    schema.model_validate(cached)
+                    if schema
+                    else AIMessage(content=cached)
+                )
+                self._record(node, hit=True)
+            except ValidationError:
+                pass
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fresh = runnable.batch([prompts[i] for i in missing], config=config)
+            for i, result in zip(missing, fresh):
+                self._record(node, hit=False)
+                self._store(
+                    keys[i],
+                    result.model_dump(mode="json") if schema else result.content,
+                )
+                results[i] = result
+        return results
+
+    def stats(self):
+        """Per-node hit/miss counters and hit rates."""
+        with self._lock:
+            return {
+                node: {
+                    **counts,
+                    "hit_rate": counts["hits"] / (counts["hits"] + counts["misses"]),
+                }
+                for node, counts in self.node_stats.items()
+            }
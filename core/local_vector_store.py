@@ -0,0 +1,299 @@
+import json
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from qdrant_client import models
+
+
+def filter_conditions(filter):
+    """Turns a `{field: value}` dict or a Qdrant `must` Filter into (field, values) pairs.
+
+    A document matches when, for every pair, its metadata[field] is one of
+    the values.
+    """
+    if isinstance(filter, dict):
+        return [(field, [value]) for field, value in filter.items()]
+    if isinstance(filter, models.Filter):
+        unsupported = [
+            clause
+            for clause in ("should", "must_not", "min_should")
+            if getattr(filter, clause)
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Unsupported filter clauses {unsupported}; only `must` is supported"
+            )
+        conditions = []
+        for condition in filter.must or []:
+            match = getattr(condition, "match", None)
+            if not isinstance(match, (models.MatchValue, models.MatchAny)):
+                raise ValueError(
+                    f"Unsupported filter condition (only MatchValue and MatchAny "
+                    f"on a key are supported): {condition!r}"
+                )
+            values = match.any if isinstance(match, models.MatchAny) else [match.value]
+            conditions.append((condition.key.removeprefix("metadata."), values))
+        return conditions
+    raise TypeError(f"Unsupported filter type: {type(filter).__name__}")
+
+
+class LocalVectorStore(VectorStore):
+    """In-process cosine-similarity vector store backed by a NumPy matrix.
+
+    Meant for corpora small enough to search exhaustively (up to a few
+    hundred thousand vectors), where a network round trip to Qdrant costs
+    more than the search itself. Rows are L2-normalized on insert, so a
+    single matrix product scores every document against one or many queries.
+
+    Filters may be a `{field: value}` dict on metadata or a Qdrant `Filter`
+    whose `must` clauses match `metadata.<field>`, so code written for
+    QdrantVectorStore works unchanged. Fields listed in `index_fields` are
+    answered from precomputed boolean bitmaps.
+    """
+
+    def __init__(self, embedding, index_fields=("category", "city")):
+        self.embedding = embedding
+        self.index_fields = tuple(index_fields)
+        # `_vectors` is a view of the used rows of `_matrix`, which grows
+        # geometrically so bulk loads do not copy the whole matrix per batch.
+        self._matrix = self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._ids = []
+        self._docs = []
+        self._rows = {}
+        self._bitmaps = None
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def __len__(self):
+        return len(self._ids)
+
+    # --- writes ------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _append(self, vectors):
+        used, count = len(self._vectors), len(vectors)
+        if used + count > len(self._matrix):
+            matrix = np.empty(
+                (max(used + count, 2 * len(self._matrix)), vectors.shape[1]),
+                dtype=np.float32,
+            )
+            matrix[:used] = self._vectors
+            self._matrix = matrix
+        self._matrix[used : used + count] = vectors
+        self._vectors = self._matrix[: used + count]
+
+    def add_vectors(self, vectors, documents, ids=None):
+        """Adds precomputed vectors; existing ids are overwritten in place."""
+        vectors = self._normalize(vectors)
+        ids = [str(i) for i in ids] if ids else [str(uuid.uuid4()) for _ in documents]
+        if not len(self._ids):
+            self._matrix = self._vectors = np.empty(
+                (0, vectors.shape[1]), dtype=np.float32
+            )
+
+        new_rows, new_vectors = [], []
+        for doc_id, vector, doc in zip(ids, vectors, documents, strict=True):
+            doc = Document(
+                page_content=doc.page_content, metadata=doc.metadata, id=doc_id
+            )
+            if doc_id in self._rows:
+                row = self._rows[doc_id]
+                self._vectors[row] = vector
+                self._docs[row] = doc
+            else:
+                self._rows[doc_id] = len(self._ids)
+                new_rows.append(doc)
+                new_vectors.append(vector)
+                self._ids.append(doc_id)
+
+        if new_rows:
+            self._append(np.stack(new_vectors))
+            self._docs.extend(new_rows)
+        self._bitmaps = None
+        return ids
+
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas, strict=True)
+        ]
+        return self.add_vectors(self.embedding.embed_documents(texts), documents, ids)
+
+    def delete(self, ids=None, **kwargs):
+        rows = [self._rows[str(i)] for i in ids or [] if str(i) in self._rows]
+        if not rows:
+            return False
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        self._matrix = self._vectors = self._vectors[keep]
+        self._ids = [i for i, k in zip(self._ids, keep) if k]
+        self._docs = [d for d, k in zip(self._docs, keep) if k]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._bitmaps = None
+        return True
+
+    def get_by_ids(self, ids, /):
+        return [self._docs[self._rows[i]] for i in ids if i in self._rows]
+
+    # --- filters -----------------------------------------------------------
+
+    def _bitmap(self, field, value):
+        if field not in self.index_fields:
+            return np.array(
+                [doc.metadata.get(field) == value for doc in self._docs], dtype=bool
+            )
+        if self._bitmaps is None:
+            self._bitmaps = {name: {} for name in self.index_fields}
+            for row, doc in enumerate(self._docs):
+                for name in self.index_fields:
+                    if name in doc.metadata:
+                        values = self._bitmaps[name]
+                        if doc.metadata[name] not in values:
+                            values[doc.metadata[name]] = np.zeros(len(self._docs), bool)
+                        values[doc.metadata[name]][row] = True
+        bitmap = self._bitmaps[field].get(value)
+        return bitmap if bitmap is not None else np.zeros(len(self._docs), bool)
+
+    def _filter_mask(self, filter):
+        """Boolean row mask for `filter`, or None to search every row."""
+        if not filter:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, values in filter_conditions(filter):
+            mask &= np.logical_or.reduce([self._bitmap(field, v) for v in values])
+        return mask
+
+    # --- search ------------------------------------------------------------
+
+    def similarity_search_by_vectors_with_score(self, vectors, k=4, filter=None):
+        """Top-k (Document, cosine score) lists for a batch of query vectors."""
+        mask = self._filter_mask(filter)
+        # Prefilter: only score the rows that pass the filter.
+        rows = np.arange(len(self._ids)) if mask is None else np.flatnonzero(mask)
+        k = min(k, len(rows))
+        if k == 0:
+            return [[] for _ in vectors]
+        candidates = self._vectors if mask is None else self._vectors[rows]
+        scores = self._normalize(vectors) @ candidates.T
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self._docs[rows[i]], float(score)) for i, score in zip(hits, hit_scores)]
+            for hits, hit_scores in zip(top, top_scores)
+        ]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        return self.similarity_search_by_vectors_with_score([embedding], k, filter)[0]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k, filter
+            )
+        ]
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Same mapping QdrantVectorStore uses for cosine distance.
+        return lambda score: (score + 1.0) / 2.0
+
+    # --- persistence -------------------------------------------------------
+
+    def save(self, path):
+        """Writes `vectors.npy` and `documents.jsonl` under directory `path`."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "vectors.npy", self._vectors)
+        with open(path / "documents.jsonl", "w") as f:
+            for doc in self._docs:
+                f.write(
+                    json.dumps(
+                        {
+                            "id": doc.id,
+                            "page_content": doc.page_content,
+                            "metadata": doc.metadata,
+                        }
+                    )
+                    + "\n"
+                )
+
+    @classmethod
+    def load(cls, path, embedding, **kwargs):
+        """Opens a saved store; vectors are memory-mapped (copy-on-write), not read into RAM."""
+        path = Path(path)
+        store = cls(embedding, **kwargs)
+        store._matrix = store._vectors = np.load(path / "vectors.npy", mmap_mode="c")
+        with open(path / "documents.jsonl") as f:
+            for line in f:
+                record = json.loads(line)
+                store._ids.append(record["id"])
+                store._docs.append(
+                    Document(
+                        page_content=record["page_content"],
+                        metadata=record["metadata"],
+                        id=record["id"],
+                    )
+                )
+        store._rows = {doc_id: row for row, doc_id in enumerate(store._ids)}
+        return store
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_qdrant(cls, client, collection_name, embedding, batch_size=1024, **kwargs):
+        """Copies a Qdrant collection written by QdrantVectorStore, without re-embedding."""
+        store = cls(embedding, **kwargs)
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                store.add_vectors(
+                    [
+                        p.vector[""] if isinstance(p.vector, dict) else p.vector
+                        for p in points
+                    ],
+                    [
+                        Document(
+                            page_content=p.payload.get("page_content", ""),
+                            metadata=p.payload.get("metadata") or {},
+                        )
+                        for p in points
+                    ],
+                    [p.id for p in points],
+                )
+            if offset is None:
+                return store
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import random
+import time
+
+from openai import RateLimitError
+from tavily.errors import UsageLimitExceededError
+
+
+def is_rate_limit_error(exc):
+    """True for provider 429s (OpenAI, Tavily, or anything exposing status_code)."""
+    return isinstance(exc, (RateLimitError, UsageLimitExceededError)) or (
+        getattr(exc, "status_code", None) == 429
+    )
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def retry_with_backoff(fn, *args, retries=5, base_delay=1.0, **kwargs):
+    """Calls `fn`, retrying with exponential backoff while it is rate limited."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_rate_limit_error(e):
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            logging.warning("Rate limited (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+
+async def aretry_with_backoff(fn, *args, retries=5, base_delay=1.0, **kwargs):
+    """Async variant of `retry_with_backoff` for coroutine functions."""
+    for attempt in range(retries + 1):
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_rate_limit_error(e):
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            logging.warning("Rate limited (%s), retrying in %.1fs", e, delay)
+            await asyncio.sleep(delay)
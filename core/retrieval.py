@@ -0,0 +1,202 @@
+from functools import lru_cache
+from typing import Literal, NamedTuple
+
+from langchain_core.tools import tool
+from langchain_qdrant import QdrantVectorStore
+from pydantic import BaseModel, Field
+from qdrant_client import models
+
+from .local_vector_store import LocalVectorStore
+
+
+class RetrievalQuery(NamedTuple):
+    question: str
+    filter: models.Filter | dict | None = None
+    k: int = 3
+
+
+@lru_cache(maxsize=None)
+def category_filter(category):
+    """Qdrant Filter on `metadata.category`, or None for no category.
+
+    Built once per category and shared; callers must not modify it.
+    """
+    if not category:
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="metadata.category", match=models.MatchValue(value=category)
+            )
+        ]
+    )
+
+
+def _qdrant_filter(filter):
+    # BM25Index and LocalVectorStore also take {field: value} dicts on metadata.
+    if isinstance(filter, dict):
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"metadata.{field}", match=models.MatchValue(value=value)
+                )
+                for field, value in filter.items()
+            ]
+        )
+    return filter
+
+
+def embed_queries(embeddings, questions):
+    """Embeds every question in a single request."""
+    # OpenAI embeds queries and documents the same way; embed_query is only
+    # the one-text case of embed_documents.
+    return embeddings.embed_documents(list(questions))
+
+
+def batch_search_by_vectors(vector_store, vectors, queries):
+    """One batched vector search for many queries; a (Document, score) list each.
+
+    Qdrant receives every query in one `query_batch_points` request. The
+    local store scores all queries sharing a filter in one matrix product.
+    """
+    queries = [RetrievalQuery(*q) for q in queries]
+    if isinstance(vector_store, LocalVectorStore):
+        groups = {}
+        for i, query in enumerate(queries):
+            groups.setdefault(repr(query.filter), []).append(i)
+        results = [None] * len(queries)
+        for rows in groups.values():
+            group = [queries[i] for i in rows]
+            found = vector_store.similarity_search_by_vectors_with_score(
+                [vectors[i] for i in rows],
+                k=max(q.k for q in group),
+                filter=group[0].filter,
+            )
+            for i, query, hits in zip(rows, group, found, strict=True):
+                results[i] = hits[: query.k]
+        return results
+
+    if isinstance(vector_store, QdrantVectorStore):
+        responses = vector_store.client.query_batch_points(
+            vector_store.collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=list(vector),
+                    using=vector_store.vector_name,
+                    filter=_qdrant_filter(query.filter),
+                    limit=query.k,
+                    with_payload=True,
+                )
+                for vector, query in zip(vectors, queries, strict=True)
+            ],
+        )
+        return [
+            [
+                (
+                    vector_store._document_from_point(
+                        point,
+                        vector_store.collection_name,
+                        vector_store.content_payload_key,
+                        vector_store.metadata_payload_key,
+                    ),
+                    point.score,
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+    raise TypeError(
+        f"Batched search is not supported for {type(vector_store).__name__}"
+    )
+
+
+def batch_similarity_search(vector_store, queries):
+    """Answers N (question, filter, k) queries with one embedding call and one search."""
+    queries = [RetrievalQuery(*q) for q in queries]
+    if not queries:
+        return []
+    vectors = embed_queries(vector_store.embeddings, [q.question for q in queries])
+    return batch_search_by_vectors(vector_store, vectors, queries)
+
+
+def format_hits(hits, min_score=0.5):
+    """Formats HybridHits for an LLM, keeping keyword matches and vectors >= min_score.
+
+    With `min_score=None` every hit is kept.
+    """
+    context = [
+        f"Policy ID: {doc.metadata.get('policy_id', 'N/A')}\n"
+        f"Topic: {doc.metadata.get('topic', 'N/A')}\n"
+        f"Rule: {doc.page_content}"
+        for doc, _, vector_score, bm25_score in hits
+        if min_score is None
+        or bm25_score is not None
+        or (vector_score or 0) >= min_score
+    ]
+    return "\n\n".join(context) if context else "NO RELEVANT DOCUMENT FOUND."
+
+
+def make_retrieval_tool(
+    retriever, categories, name="retrieve_relevant_docs", min_score=0.5
+):
+    """LangChain tool answering one policy question with `retriever`.
+
+    `categories` are the allowed values of `metadata.category` offered to
+    the model as the optional filter.
+    """
+    Category = Literal[tuple(categories)]
+
+    @tool(
+        name_or_callable=name,
+        description="Retrieve relevant policy documents based on a question and "
+        "optional filter.",
+    )
+    def retrieve(question: str, filter: Category | None = None, k: int = 3) -> str:
+        print(f"\n[CHAIN LOG] Searching for: '{question}' in '{filter or 'ALL'}'")
+        hits, timings = retriever.search(question, k=k, filter=category_filter(filter))
+        print(f"[CHAIN LOG] Retrieval latency (ms): {timings}")
+        return format_hits(hits, min_score)
+
+    return retrieve
+
+
+def make_batch_retrieval_tool(
+    retriever, categories, name="retrieve_many_docs", min_score=0.5
+):
+    """LangChain tool answering several policy questions in one retrieval round trip.
+
+    `retriever` is a HybridRetriever; `categories` are the allowed values of
+    `metadata.category` offered to the model as filters.
+    """
+    Category = Literal[tuple(categories)]
+
+    class Lookup(BaseModel):
+        question: str = Field(description="A self-contained policy question.")
+        filter: Category | None = Field(
+            default=None, description="Optional policy category to search in."
+        )
+        k: int = Field(default=3, description="Number of documents to return.")
+
+    @tool(
+        name_or_callable=name,
+        description="Retrieve relevant policy documents for several questions at "
+        "once. Prefer this over repeated single lookups.",
+    )
+    def retrieve_many(lookups: list[Lookup]) -> str:
+        print(f"\n[CHAIN LOG] Batched search for {len(lookups)} questions")
+        results, timings = retriever.search_many(
+            [
+                RetrievalQuery(
+                    lookup.question, category_filter(lookup.filter), lookup.k
+                )
+                for lookup in lookups
+            ]
+        )
+        print(f"[CHAIN LOG] Retrieval latency (ms): {timings}")
+        return "\n\n".join(
+            f"### Question {i}: {lookup.question}\n{format_hits(hits, min_score)}"
+            for i, (lookup, hits) in enumerate(zip(lookups, results), start=1)
+        )
+
+    return retrieve_many
@@ -0,0 +1,106 @@
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient
+
+from .bm25 import BM25Index
+from .embedding_cache import EmbeddingCache
+from .hybrid_search import HybridRetriever
+from .ingestion import EMBEDDING_MODEL
+from .local_vector_store import LocalVectorStore
+from .retrieval import category_filter
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+
+
+def bm25_path(collection_name):
+    """Where data_ingestion.py saves the BM25 index of a collection."""
+    return CACHE_DIR / "bm25" / f"{collection_name}.json"
+
+
+@lru_cache(maxsize=None)
+def get_qdrant_client():
+    """Process-wide Qdrant client; its gRPC channel is shared by every store."""
+    return QdrantClient(
+        url=os.getenv("QDRANT_URL"),
+        api_key=os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=True,
+    )
+
+
+def get_embeddings(model=None):
+    """Process-wide, disk-cached embeddings; one HTTP connection pool per model.
+
+    Each model has its own cache directory, since vectors of different
+    models (and dimensions) cannot share one file.
+    """
+    return _embeddings(model or EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=None)
+def _embeddings(model):
+    return EmbeddingCache(
+        OpenAIEmbeddings(model=model), CACHE_DIR / "embeddings" / model
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm(model="gpt-4.1-mini", temperature=0.2):
+    return ChatOpenAI(model=model, temperature=temperature)
+
+
+@lru_cache(maxsize=None)
+def get_retriever(collection_name, backend=None):
+    """The HybridRetriever for `collection_name`, built once and shared.
+
+    `backend="local"` (or VECTOR_BACKEND=local) searches an in-process copy
+    of the collection instead of calling Qdrant for every question. The BM25
+    index saved by data_ingestion.py is used when present; otherwise it is
+    built from the collection payloads.
+    """
+    client = get_qdrant_client()
+    embeddings = get_embeddings()
+    if (backend or os.getenv("VECTOR_BACKEND")) == "local":
+        vector_store = LocalVectorStore.from_qdrant(client, collection_name, embeddings)
+    else:
+        vector_store = QdrantVectorStore(
+            client=client, collection_name=collection_name, embedding=embeddings
+        )
+
+    path = bm25_path(collection_name)
+    bm25 = (
+        BM25Index.load(path)
+        if path.exists()
+        else BM25Index.from_qdrant(client, collection_name)
+    )
+    return HybridRetriever(vector_store, bm25)
+
+
+def warm_up(*collection_names, embeddings=True):
+    """Moves connection setup and index loading off the query path.
+
+    Builds the retriever of each collection (opening the Qdrant gRPC
+    channel and loading BM25), compiles the category Filter of every
+    category found in it and, with `embeddings`, sends one request so the
+    OpenAI connection is open. Returns the time spent per step in ms.
+    """
+    timings = {}
+    for name in collection_names:
+        started = time.perf_counter()
+        retriever = get_retriever(name)
+        get_qdrant_client().get_collection(name)
+        for category in {
+            doc.metadata.get("category") for doc in retriever.bm25.documents()
+        }:
+            category_filter(category)
+        timings[name] = round((time.perf_counter() - started) * 1e3, 2)
+    if embeddings:
+        started = time.perf_counter()
+        # Straight to the model: a cache hit would not open a connection.
+        get_embeddings().embeddings.embed_query("warm-up")
+        timings["embeddings"] = round((time.perf_counter() - started) * 1e3, 2)
+    return timings
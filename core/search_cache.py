@@ -0,0 +1,65 @@
+import hashlib
+import json
+
+from .cache import DiskCache
+from .rate_limit import retry_with_backoff
+
+
+class SearchCacheMiss(LookupError):
+    """Raised in replay-only mode when a query has no cached result."""
+
+
+def normalize_query(query):
+    """Lower-cases and collapses whitespace so trivial rewordings share a key."""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Disk-backed cache in front of a Tavily client's `search` method.
+
+    Only cache misses reach the client. They wait on the optional shared
+    `rate_limiter` (a LangChain rate limiter) first and are retried with
+    backoff when the provider answers 429.
+    """
+
+    def __init__(
+        self,
+        client,
+        path,
+        ttl_seconds=7 * 24 * 3600,
+        max_entries=10_000,
+        replay_only=False,
+        rate_limiter=None,
+    ):
+        self.client = client
+        self.replay_only = replay_only
+        self.rate_limiter = rate_limiter
+        self.store = DiskCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(query, **params):
+        payload = json.dumps(
+            {"query": normalize_query(query), **params}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def search(self, query, **params):
+        key = self.make_key(query, **params)
+        cached = self.store.get(key)
+        if cached is not None:
+            return cached
+
+        if self.replay_only:
+            raise SearchCacheMiss(f"No cached search result for query: {query!r}")
+
+        result = retry_with_backoff(self._search, query, **params)
+        self.store.set(key, result)
+        return result
+
+    def _search(self, query, **params):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.client.search(query, **params)
+
+    def stats(self):
+        return self.store.stats()
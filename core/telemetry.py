@@ -0,0 +1,199 @@
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# USD per 1M (prompt, completion) tokens.
+MODEL_PRICES = {
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-5-mini": (0.25, 2.00),
+}
+
+_current_span = ContextVar("current_span", default=None)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call, or 0.0 for models missing from MODEL_PRICES."""
+    # Longest prefix first so "gpt-4.1-mini-2025-04-14" is not priced as "gpt-4.1".
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if (model or "").startswith(name):
+            prompt_price, completion_price = MODEL_PRICES[name]
+            return (
+                prompt_tokens * prompt_price + completion_tokens * completion_price
+            ) / 1e6
+    return 0.0
+
+
+class Telemetry:
+    """Collects timing spans and histograms for one process.
+
+    Spans are recorded in a flat, OpenTelemetry-like shape (trace/span/parent
+    ids, unix-nano timestamps, attributes) and can be exported as JSONL.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.histograms = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def _open(self, name, attributes, parent=None):
+        parent = parent or _current_span.get()
+        return {
+            "traceId": parent["traceId"] if parent else os.urandom(16).hex(),
+            "spanId": os.urandom(8).hex(),
+            "parentSpanId": parent["spanId"] if parent else "",
+            "name": name,
+            "startTimeUnixNano": time.time_ns(),
+            "attributes": dict(attributes),
+            "status": {"code": "OK"},
+        }
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Times the enclosed block; yields the span's attribute dict for extra data."""
+        span = self._open(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span["attributes"]
+        except BaseException as e:
+            span["status"] = {"code": "ERROR", "message": str(e)}
+            raise
+        finally:
+            _current_span.reset(token)
+            span["endTimeUnixNano"] = time.time_ns()
+            self._record(span)
+
+    def trace(self, name):
+        """Decorator that wraps every call of a function in a span called `name`."""
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def node(self, fn):
+        """Decorator for LangGraph node functions (span name `node:<function>`)."""
+        return self.trace(f"node:{fn.__name__}")(fn)
+
+    def observe(self, name, value):
+        """Adds one observation to the histogram `name`."""
+        with self._lock:
+            self.histograms[name][value] += 1
+
+    def callback_handler(self):
+        return TelemetryCallbackHandler(self)
+
+    def export_jsonl(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(path, "a") as f:
+            for span in self.spans:
+                f.write(json.dumps(span) + "\n")
+
+    def summary(self):
+        """Returns a plain-text table of per-span latency, tokens and cost."""
+        with self._lock:
+            spans = list(self.spans)
+            histograms = {
+                name: dict(counts) for name, counts in self.histograms.items()
+            }
+
+        groups = defaultdict(list)
+        for span in spans:
+            groups[span["name"]].append(span)
+
+        lines = [
+            f"{'span':<34}{'count':>6}{'total s':>9}{'avg ms':>9}{'p95 ms':>9}"
+            f"{'prompt tok':>12}{'compl tok':>11}{'cost $':>9}",
+        ]
+        total_cost = 0.0
+        for name, group in sorted(groups.items()):
+            durations = sorted(
+                (s["endTimeUnixNano"] - s["startTimeUnixNano"]) / 1e6 for s in group
+            )
+            p95 = durations[min(len(durations) - 1, int(0.95 * len(durations)))]
+            prompt = sum(s["attributes"].get("prompt_tokens", 0) for s in group)
+            completion = sum(s["attributes"].get("completion_tokens", 0) for s in group)
+            cost = sum(s["attributes"].get("cost_usd", 0.0) for s in group)
+            total_cost += cost
+            lines.append(
+                f"{name:<34}{len(group):>6}{sum(durations) / 1e3:>9.2f}"
+                f"{statistics.fmean(durations):>9.1f}{p95:>9.1f}"
+                f"{prompt:>12}{completion:>11}{cost:>9.4f}"
+            )
+        lines.append(f"Estimated total cost: ${total_cost:.4f}")
+
+        for name, counts in sorted(histograms.items()):
+            lines.append(f"\n{name}:")
+            for value, count in sorted(counts.items()):
+                lines.append(f"  {value:>4} | {'#' * count} {count}")
+        return "\n".join(lines)
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Records a span with token counts and cost for every chat model call."""
+
+    # Run in the caller's context so spans nest under the active node span.
+    run_inline = True
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+        self._open_spans = {}
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):
+        node = (metadata or {}).get("langgraph_node", "unknown")
+        self._open_spans[run_id] = self.telemetry._open(f"llm.invoke:{node}", {})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._open_spans.pop(run_id, None)
+        if span is None:
+            return
+
+        usage = {}
+        generation = response.generations[0][0] if response.generations else None
+        message = getattr(generation, "message", None)
+        if message is not None and message.usage_metadata:
+            usage = message.usage_metadata
+        model = (response.llm_output or {}).get("model_name") or (
+            message.response_metadata.get("model_name") if message is not None else None
+        )
+
+        prompt_tokens = usage.get("input_tokens", 0)
+        completion_tokens = usage.get("output_tokens", 0)
+        span["attributes"].update(
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_usd=estimate_cost(model, prompt_tokens, completion_tokens),
+        )
+        span["endTimeUnixNano"] = time.time_ns()
+        self.telemetry._record(span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._open_spans.pop(run_id, None)
+        if span is None:
+            return
+        span["status"] = {"code": "ERROR", "message": str(error)}
+        span["endTimeUnixNano"] = time.time_ns()
+        self.telemetry._record(span)
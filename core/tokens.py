@@ -0,0 +1,62 @@
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+# Rough size of one token in English text, used when tiktoken cannot load.
+CHARS_PER_TOKEN = 4
+
+
+class ApproximateEncoding:
+    """Stand-in for a tiktoken encoding: every CHARS_PER_TOKEN characters are a token."""
+
+    name = "approximate"
+
+    def encode(self, text):
+        return [
+            text[i : i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)
+        ]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def get_encoding(model=DEFAULT_MODEL):
+    """Returns the tiktoken encoding for `model`, falling back to o200k_base.
+
+    tiktoken downloads its BPE files on first use. Without network access
+    (and without a pre-seeded TIKTOKEN_CACHE_DIR) a character-based
+    `ApproximateEncoding` is returned instead, so offline replay runs work.
+    """
+    return _load_encoding(model)
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model):
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logging.warning(
+            "Could not load tiktoken encoding for %s (%s); estimating tokens "
+            "from character counts",
+            model,
+            e,
+        )
+        return ApproximateEncoding()
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    return len(get_encoding(model).encode(text))
+
+
+def truncate_to_tokens(text, max_tokens, model=DEFAULT_MODEL):
+    """Cuts `text` down to at most `max_tokens` tokens, keeping the beginning."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -1,13 +1,28 @@
-import os
+import argparse
+import asyncio
+from pathlib import Path
 
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from langchain_qdrant import QdrantVectorStore
 
-from core import load_vault_env
+from core import (
+    BM25Index,
+    bm25_path,
+    get_qdrant_client,
+    ingest_stream,
+    iter_documents,
+    load_vault_env,
+    sync_documents,
+)
+from core.ingestion import EMBEDDING_MODEL
 
 load_vault_env()
 
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+# Content hashes of what is already in each collection; see core/ingestion.py.
+MANIFEST_FILE = CACHE_DIR / "ingestion_manifest.json"
+
 raw_data = [
     # --- FINANCE (10 Docs) ---
     (
@@ -344,11 +359,51 @@ policy_docs = [
 
 
 if __name__ == "__main__":
-    # Load document into already existing Qdrant collection
-    vector_store = QdrantVectorStore.from_existing_collection(
+    parser = argparse.ArgumentParser(description="Sync policy docs into Qdrant")
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        help="JSONL/CSV/Markdown files or directories to stream in "
+        "(default: the built-in policy_docs)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the manifest and re-upsert every document",
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="embedding requests in flight"
+    )
+    parser.add_argument("--chunk-tokens", type=int, default=512)
+    args = parser.parse_args()
+
+    # Load document into already existing Qdrant collection. Documents are
+    # embedded once, so they bypass the query-side embedding cache instead of
+    # evicting the cached questions from it.
+    vector_store = QdrantVectorStore(
+        client=get_qdrant_client(),
         collection_name="apex_policies",
-        embedding=OpenAIEmbeddings(model="text-embedding-3-small"),
-        url=os.getenv("QDRANT_URL"),
-        api_key=os.getenv("QDRANT_API_KEY"),
+        embedding=OpenAIEmbeddings(model=EMBEDDING_MODEL),
     )
-    vector_store.add_documents(policy_docs)
+    # Only new or changed documents are embedded; removed ones are deleted.
+    if args.sources:
+        stats = asyncio.run(
+            ingest_stream(
+                vector_store,
+                iter_documents(args.sources),
+                MANIFEST_FILE,
+                full=args.full,
+                batch_size=args.batch_size,
+                chunk_tokens=args.chunk_tokens,
+                concurrency=args.concurrency,
+            )
+        )
+    else:
+        stats = sync_documents(vector_store, policy_docs, MANIFEST_FILE, full=args.full)
+    print(f"[Ingestion] {stats}")
+
+    # Keyword index read by core.get_retriever(), rebuilt after every sync.
+    bm25 = BM25Index.from_qdrant(vector_store.client, vector_store.collection_name)
+    bm25.save(bm25_path(vector_store.collection_name))
+    print(f"[BM25] Indexed {len(bm25)} documents")